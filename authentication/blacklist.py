@@ -0,0 +1,145 @@
+"""
+In-process Bloom filter in front of the refresh token blacklist.
+
+simplejwt looks every refresh token up in ``BlacklistedToken`` before using
+it. The filter holds the jti of every blacklisted token, so a token it has
+never seen is known not to be blacklisted without a query; only possible
+matches (real ones and the ``TOKEN_BLACKLIST_BLOOM_ERROR_RATE`` false
+positives) go on to the database.
+
+Each process builds the filter from the table on its first check and then
+only reads new rows. Logouts add their token at once and bump a version in
+Django's cache, which tells the other processes to read the rows added since
+their last sync. A process reads that version at most every
+``TOKEN_BLACKLIST_SYNC_INTERVAL`` seconds, so most checks run no query at
+all, and a logout on another worker is seen within that delay. As with
+idempotency keys, the cache must be shared between workers.
+"""
+import hashlib
+import math
+import threading
+import time
+from django.core.cache import cache
+from django.conf import settings
+from django.db import transaction
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+VERSION_KEY = 'token-blacklist:version'
+# Ids are handed out before commit, so a row may land below the last id read. Re-read that
+# many ids back on every sync to catch it.
+SYNC_LOOKBACK = 1000
+
+_lock = threading.Lock()
+_filter = None
+_synced_id = 0
+_version = None
+_checked_at = None
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        """Sets the value's bits, counting it only if one of them was still unset."""
+        added = False
+        for position in self._positions(value):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        # Values read again by a sync or already added at logout must not fill up the filter
+        self.count += added
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock, an evicted counter must not come back to a version already synced
+        cache.add(VERSION_KEY, time.time_ns() // 1000, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _sync():
+    """Reads the rows added since the last sync, rebuilding a bigger filter once it is full."""
+    global _filter, _synced_id
+    if _filter is None or _filter.count > _filter.capacity:
+        # Compacted rows drop out here as well
+        capacity = max(settings.TOKEN_BLACKLIST_BLOOM_CAPACITY, BlacklistedToken.objects.count() * 2)
+        _filter = BloomFilter(capacity, settings.TOKEN_BLACKLIST_BLOOM_ERROR_RATE)
+        _synced_id = 0
+
+    rows = BlacklistedToken.objects.filter(id__gt=_synced_id - SYNC_LOOKBACK) \
+        .order_by('id').values_list('id', 'token__jti')
+    for row_id, jti in rows.iterator():
+        _filter.add(jti)
+        _synced_id = max(_synced_id, row_id)
+
+
+def might_be_blacklisted(jti):
+    """``False`` when the token is certainly not blacklisted, ``True`` when the database must tell."""
+    global _version, _checked_at
+    now = time.monotonic()
+    if _filter is not None and now - _checked_at < settings.TOKEN_BLACKLIST_SYNC_INTERVAL:
+        with _lock:
+            return jti in _filter
+
+    version = _current_version()
+    with _lock:
+        if _filter is None or version != _version:
+            _sync()
+            _version = version
+        _checked_at = now
+        return jti in _filter
+
+
+def _bump():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Evicted, the next check starts a new version and every process syncs
+        pass
+
+
+def add(jti):
+    """Records a freshly blacklisted jti here now and, once committed, in the other processes."""
+    with _lock:
+        if _filter is not None:
+            _filter.add(jti)
+    _bump()
+    transaction.on_commit(_bump)
+
+
+def clear():
+    global _filter, _synced_id, _version, _checked_at
+    with _lock:
+        _filter, _synced_id, _version, _checked_at = None, 0, None, None
+
+
+class FilteredRefreshToken(RefreshToken):
+    """``RefreshToken`` that asks the Bloom filter before the blacklist table."""
+
+    def check_blacklist(self):
+        if might_be_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self):
+        result = super().blacklist()
+        add(self.payload[api_settings.JTI_CLAIM])
+        return result
@@ -0,0 +1,116 @@
+"""
+Password hashing off the request thread.
+
+PBKDF2 is meant to be slow, so ``make_password`` and ``check_password`` run on
+an executor chosen by ``PASSWORD_HASHING_EXECUTOR``: ``process`` (default, a
+pool of ``PASSWORD_HASHING_WORKERS`` processes, the CPU count when unset),
+``thread`` or ``inline``. Every web worker process gets its own pool, so
+size ``PASSWORD_HASHING_WORKERS`` with the number of web workers in mind.
+
+At most ``PASSWORD_HASHING_MAX_PENDING`` hashes wait or run at once per web
+worker; past that requests fail fast with 503 instead of queueing behind a
+login storm.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+_lock = threading.Lock()
+_executor = None
+_pending = 0
+
+
+class HashingOverloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins at the moment, try again in a few seconds.'
+    default_code = 'hashing_overloaded'
+
+
+def _init_worker():
+    # Needed when the platform spawns workers instead of forking them
+    django.setup()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None and settings.PASSWORD_HASHING_EXECUTOR != 'inline':
+            workers = settings.PASSWORD_HASHING_WORKERS or os.cpu_count()
+            if settings.PASSWORD_HASHING_EXECUTOR == 'process':
+                _executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+            else:
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+        return _executor
+
+
+def shutdown():
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+@receiver(setting_changed)
+def _reset_executor(setting, **kwargs):
+    if setting.startswith('PASSWORD_HASH'):
+        shutdown()
+
+
+def _run(function, *args):
+    global _pending
+    with _lock:
+        if _pending >= settings.PASSWORD_HASHING_MAX_PENDING:
+            raise HashingOverloaded()
+        _pending += 1
+
+    try:
+        executor = _get_executor()
+        if executor is None:
+            return function(*args)
+        return executor.submit(function, *args).result()
+    finally:
+        with _lock:
+            _pending -= 1
+
+
+def _check(password, encoded):
+    """Returns ``(matches, encoded again with the current hasher or None)``."""
+    if not hashers.check_password(password, encoded):
+        return False, None
+
+    preferred = hashers.get_hasher('default')
+    hasher = hashers.identify_hasher(encoded)
+    if hasher.algorithm != preferred.algorithm or preferred.must_update(encoded):
+        return True, hashers.make_password(password)
+    return True, None
+
+
+def make_password(password):
+    return _run(hashers.make_password, password)
+
+
+def set_password(user, password):
+    """``user.set_password()`` with the hashing done on the executor."""
+    user.password = make_password(password)
+    # Lets save() notify the password validators, as set_password() does
+    user._password = password
+
+
+def check_password(user, password):
+    """
+    ``user.check_password()`` with the hashing done on the executor. A hash made
+    with an older hasher or iteration count is replaced and saved on success.
+    """
+    matches, upgraded = _run(_check, password, user.password)
+    if upgraded is not None:
+        user.password = upgraded
+        user.save(update_fields=['password'])
+    return matches
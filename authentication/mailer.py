@@ -0,0 +1,186 @@
+"""
+Fixed pool of email workers fed by a bounded queue.
+
+``send`` queues a message for ``EMAIL_POOL_WORKERS`` threads, started on the
+first message. A worker takes what is waiting, up to ``EMAIL_BATCH_SIZE``
+messages, and sends them over one backend connection. Messages that fail are
+retried on a new connection after ``EMAIL_RETRY_BACKOFF`` seconds, doubled
+on each attempt, at most ``EMAIL_MAX_RETRIES`` times.
+
+When ``EMAIL_QUEUE_SIZE`` messages are already waiting, the caller waits at
+most ``EMAIL_ENQUEUE_TIMEOUT`` seconds for a free slot, then drops the message
+and counts it as ``overflow``: a burst must not hold requests for the SMTP
+server's time. Queued messages are delivered before the process exits.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from django.conf import settings
+from django.core import mail
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+_lock = threading.Lock()
+_pool = None
+_stats = {'queued': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'overflow': 0, 'batches': 0}
+
+
+def _count(metric, amount=1):
+    with _lock:
+        _stats[metric] += amount
+
+
+def stats():
+    with _lock:
+        current = dict(_stats)
+        pool = _pool
+    current['pending'] = pool.queue.qsize() if pool is not None else 0
+    return current
+
+
+def _deliver(messages):
+    """Sends the messages over one connection, returning those that failed."""
+    connection = mail.get_connection()
+    try:
+        connection.open()
+    except Exception:
+        logger.exception('Could not connect to the email backend')
+        return messages
+
+    failed = []
+    try:
+        for message in messages:
+            # The connection is already open, send_messages() leaves it so for the next one
+            try:
+                connection.send_messages([message])
+            except Exception:
+                logger.exception('Could not send email to %s', ', '.join(message.recipients()))
+                failed.append(message)
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return failed
+
+
+def deliver(messages):
+    """Sends the messages, retrying failures with backoff. Returns the number sent."""
+    pending = list(messages)
+    for attempt in range(settings.EMAIL_MAX_RETRIES + 1):
+        if attempt:
+            _count('retried', len(pending))
+            time.sleep(settings.EMAIL_RETRY_BACKOFF * 2 ** (attempt - 1))
+        failed = _deliver(pending)
+        _count('sent', len(pending) - len(failed))
+        _count('batches')
+        if not failed:
+            return len(messages)
+        pending = failed
+
+    _count('failed', len(pending))
+    return len(messages) - len(pending)
+
+
+class EmailPool:
+
+    def __init__(self, workers, queue_size, batch_size):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.threads = [threading.Thread(target=self._work, name=f'email-{i}', daemon=True) for i in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, message, timeout=0):
+        """Queues the message, returning ``False`` when the queue is still full after ``timeout`` seconds."""
+        try:
+            self.queue.put(message, timeout=timeout)
+        except queue.Full:
+            return False
+        return True
+
+    def _take(self):
+        batch = [self.queue.get()]
+        while batch[-1] is not _STOP and len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self):
+        while True:
+            batch = self._take()
+            stop = batch[-1] is _STOP
+            messages = batch[:-1] if stop else batch
+            try:
+                if messages:
+                    deliver(messages)
+            except Exception:
+                # A worker that dies would leave the queue to fill up for good
+                logger.exception('Email worker failed')
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            if stop:
+                return
+
+    def join(self):
+        """Waits until every queued message has been sent or given up on."""
+        self.queue.join()
+
+    def shutdown(self, timeout=None):
+        for _ in self.threads:
+            # Blocks while the queue is full: the stops go after the messages, so these are sent first
+            self.queue.put(_STOP)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self.threads:
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+
+
+def _get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = EmailPool(settings.EMAIL_POOL_WORKERS, settings.EMAIL_QUEUE_SIZE, settings.EMAIL_BATCH_SIZE)
+        return _pool
+
+
+def send(message):
+    """Queues the message for the pool, returning ``False`` if it was dropped because the queue is full."""
+    if not _get_pool().submit(message, settings.EMAIL_ENQUEUE_TIMEOUT):
+        _count('overflow')
+        logger.error('Email queue full, dropped email to %s', ', '.join(message.recipients()))
+        return False
+    _count('queued')
+    return True
+
+
+def flush():
+    with _lock:
+        pool = _pool
+    if pool is not None:
+        pool.join()
+
+
+def shutdown(timeout=None):
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(timeout)
+
+
+atexit.register(shutdown, 30)
+
+
+@receiver(setting_changed)
+def _reset_pool(setting, **kwargs):
+    if setting.startswith('EMAIL_'):
+        shutdown()
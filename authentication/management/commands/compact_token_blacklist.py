@@ -0,0 +1,40 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired outstanding and blacklisted tokens in short chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=settings.TOKEN_BLACKLIST_COMPACT_CHUNK_SIZE,
+                            help='Number of outstanding tokens deleted per database transaction')
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Seconds to wait between chunks, to leave room for logins and logouts')
+
+    def handle(self, *args, **options):
+        # Fixed cutoff, so tokens expiring while this runs don't keep it going
+        expired = OutstandingToken.objects.filter(expires_at__lt=timezone.now()) \
+            .order_by('id').values_list('id', flat=True)
+
+        last_id = 0
+        deleted = 0
+        while True:
+            chunk = list(expired.filter(id__gt=last_id)[:options['chunk_size']])
+            if not chunk:
+                break
+
+            with transaction.atomic():
+                BlacklistedToken.objects.filter(token_id__in=chunk).delete()
+                OutstandingToken.objects.filter(id__in=chunk).delete()
+
+            last_id = chunk[-1]
+            deleted += len(chunk)
+            self.stdout.write(f'Deleted {deleted} expired tokens')
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'Done, {deleted} expired tokens deleted'))
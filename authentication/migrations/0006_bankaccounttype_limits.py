@@ -0,0 +1,33 @@
+# Generated by Django 3.1.4 on 2026-10-18 19:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0005_auto_20210104_1848'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bankaccounttype',
+            name='daily_amount_limit',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='bankaccounttype',
+            name='daily_count_limit',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bankaccounttype',
+            name='hourly_amount_limit',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='bankaccounttype',
+            name='hourly_count_limit',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
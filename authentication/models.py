@@ -2,6 +2,7 @@ from datetime import date
 from django.db import models
 from django.contrib.auth.models import (AbstractBaseUser, BaseUserManager, PermissionsMixin)
 from rest_framework_simplejwt.tokens import RefreshToken
+from . import hashing
 
 
 MALE = 'M'
@@ -23,7 +24,10 @@ class UserManager(BaseUserManager):
             raise TypeError('Users should have a email')
 
         user = self.model(username=username, email=self.normalize_email(email))
-        user.set_password(password)
+        if password is None:
+            user.set_unusable_password()
+        else:
+            hashing.set_password(user, password)
         user.save()
         return user
 
@@ -76,6 +80,21 @@ class BankAccountType(models.Model):
         decimal_places=2,
         max_digits=12
     )
+    # Cumulative limits on money leaving the account (withdrawals and transfers), empty means no limit
+    hourly_amount_limit = models.DecimalField(
+        decimal_places=2,
+        max_digits=12,
+        null=True,
+        blank=True
+    )
+    hourly_count_limit = models.PositiveIntegerField(null=True, blank=True)
+    daily_amount_limit = models.DecimalField(
+        decimal_places=2,
+        max_digits=12,
+        null=True,
+        blank=True
+    )
+    daily_count_limit = models.PositiveIntegerField(null=True, blank=True)
 
     def __str__(self):
         return self.name
@@ -0,0 +1,108 @@
+"""
+Per-process cache of authenticated users.
+
+Holds each user with its bank account and account type, as loaded by one
+``select_related`` query, for ``AUTH_PRINCIPAL_CACHE_TTL`` seconds and at
+most ``AUTH_PRINCIPAL_CACHE_SIZE`` users, least recently used out first.
+
+Writes that change a cached user (balance, profile, ``is_active``, account
+type) drop it in the process that made them and, once committed, set a new
+stamp for the user in Django's cache. Every process compares the stamp read
+when it loaded the user with the current one at most every
+``AUTH_PRINCIPAL_SYNC_INTERVAL`` seconds, so a deactivation or a balance
+change made on another worker is seen within that delay, while most requests
+still run no query. The cache must be shared between workers.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Bumped when every user must be reloaded, e.g. after an account type edit
+ALL_USERS = 'all'
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+
+
+def _stamp_keys(user_id):
+    return [f'principal-version:{user_id}', f'principal-version:{ALL_USERS}']
+
+
+def stamp(user_id):
+    """The user's shared stamp, read before loading the user so that a write committed meanwhile shows."""
+    keys = _stamp_keys(user_id)
+    stamps = cache.get_many(keys)
+    return tuple(stamps.get(key) for key in keys)
+
+
+def get(user_id):
+    """Returns a private copy of the cached user, or ``None``."""
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is None:
+            return None
+        expires, checked, loaded_stamp, user = entry
+        if expires < now:
+            del _entries[user_id]
+            return None
+        _entries.move_to_end(user_id)
+
+    if now - checked >= settings.AUTH_PRINCIPAL_SYNC_INTERVAL:
+        if stamp(user_id) != loaded_stamp:
+            # Written by another process since it was loaded
+            invalidate(user_id)
+            return None
+        with _lock:
+            if _entries.get(user_id) is entry:
+                _entries[user_id] = (expires, now, loaded_stamp, user)
+    # Views may change request.user, they must never change the cached copy
+    return copy.deepcopy(user)
+
+
+def set(user_id, user, loaded_stamp):
+    """Caches the user, ``loaded_stamp`` being what ``stamp()`` returned before it was loaded."""
+    user = copy.deepcopy(user)
+    now = time.monotonic()
+    with _lock:
+        _entries[user_id] = (now + settings.AUTH_PRINCIPAL_CACHE_TTL, now, loaded_stamp, user)
+        _entries.move_to_end(user_id)
+        while len(_entries) > settings.AUTH_PRINCIPAL_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+
+def invalidate(*user_ids):
+    with _lock:
+        for user_id in user_ids:
+            _entries.pop(user_id, None)
+
+
+def _bump(*user_ids):
+    new_stamp = time.time_ns()
+    # Outlives every entry loaded under the previous stamp, an expired stamp reads as None
+    cache.set_many({_stamp_keys(user_id)[0]: new_stamp for user_id in user_ids},
+                   settings.AUTH_PRINCIPAL_CACHE_TTL * 2)
+
+
+def invalidate_on_commit(*user_ids):
+    """
+    Drops the users now and again once the transaction commits, in case a
+    request cached the old rows in between, then tells the other processes.
+    """
+    invalidate(*user_ids)
+    transaction.on_commit(lambda: (invalidate(*user_ids), _bump(*user_ids)))
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def clear_on_commit():
+    """``invalidate_on_commit`` for every user."""
+    clear()
+    transaction.on_commit(lambda: (clear(), _bump(ALL_USERS)))
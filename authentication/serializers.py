@@ -1,11 +1,15 @@
 from rest_framework import serializers
 from rest_framework.exceptions import AuthenticationFailed
-from rest_framework_simplejwt.tokens import RefreshToken, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import TokenError
 from django.contrib import auth
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.encoding import smart_str, force_str, smart_bytes, DjangoUnicodeDecodeError
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.conf import settings
+from . import hashing
+from .blacklist import FilteredRefreshToken
 from .models import User, UserAddress, UserBankAccount
 
 
@@ -67,12 +71,8 @@ class LoginSerializer(serializers.ModelSerializer):
     tokens = serializers.SerializerMethodField()
 
     def get_tokens(self, obj):
-        user = User.objects.get(email=obj['email'])
-
-        return {
-            'access': user.tokens()['access'],
-            'refresh': user.tokens()['refresh']
-        }
+        # Minted once in validate(), every call to tokens() adds an OutstandingToken row
+        return obj['tokens']
 
     class Meta:
         model = User
@@ -94,7 +94,7 @@ class LoginSerializer(serializers.ModelSerializer):
             'id': user.id,
             'email': user.email,
             'username': user.username,
-            'tokens': user.tokens
+            'tokens': user.tokens()
         }
 
 
@@ -128,14 +128,15 @@ class SetNewPasswordSerializer(serializers.Serializer):
             if not PasswordResetTokenGenerator().check_token(user, token):
                 raise AuthenticationFailed('The reset link is invalid', 401)
 
-            user.set_password(password)
-            user.save()
-
-            return user
-
         except Exception as e:
             raise AuthenticationFailed('The reset link is invalid', 401)
 
+        # Outside the try, an overloaded executor must answer 503, not "invalid link"
+        hashing.set_password(user, password)
+        user.save()
+
+        return user
+
 
 class LogoutSerializer(serializers.Serializer):
     refresh = serializers.CharField()
@@ -151,11 +152,31 @@ class LogoutSerializer(serializers.Serializer):
 
     def save(self, **kwargs):
         try:
-            RefreshToken(self.token).blacklist()
+            FilteredRefreshToken(self.token).blacklist()
         except TokenError:
             self.fail('bad_token')
 
 
+class FilteredTokenRefreshSerializer(TokenRefreshSerializer):
+    """simplejwt's refresh, with the blacklist checked through the Bloom filter."""
+
+    def validate(self, attrs):
+        refresh = FilteredRefreshToken(attrs['refresh'])
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+
+            refresh.set_jti()
+            refresh.set_exp()
+
+            data['refresh'] = str(refresh)
+
+        return data
+
+
 class UserBankAccountData(serializers.ModelSerializer):
     class Meta:
         model = UserBankAccount
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import principals
+from .models import BankAccountType, User, UserBankAccount
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    principals.invalidate_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=UserBankAccount)
+@receiver(post_delete, sender=UserBankAccount)
+def drop_cached_account(sender, instance, **kwargs):
+    principals.invalidate_on_commit(instance.user_id)
+
+
+@receiver(post_save, sender=BankAccountType)
+def drop_cached_account_type(sender, instance, **kwargs):
+    # Shared by many users and rarely edited, start over
+    principals.clear_on_commit()
@@ -0,0 +1,115 @@
+import datetime
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from io import StringIO
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from authentication import blacklist
+from authentication.blacklist import BloomFilter
+from authentication.models import User
+
+
+class TestBloomFilter(APITestCase):
+
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f'jti-{i}')
+
+        self.assertTrue(all(f'jti-{i}' in bloom for i in range(1000)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_adding_a_value_again_does_not_count(self):
+        bloom = BloomFilter(10, 0.01)
+        bloom.add('jti')
+        bloom.add('jti')
+
+        self.assertEqual(bloom.count, 1)
+
+
+class TestTokenBlacklist(APITestCase):
+
+    def setUp(self):
+        blacklist.clear()
+        cache.delete(blacklist.VERSION_KEY)
+        self.addCleanup(blacklist.clear)
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password123')
+
+        return super().setUp()
+
+    def refresh(self, token):
+        return self.client.post('/auth/token/refresh', {'refresh': str(token)})
+
+    def test_unknown_token_skips_the_blacklist_table(self):
+        token = RefreshToken.for_user(self.user)
+        blacklist.might_be_blacklisted('warm-up')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.refresh(token)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries if 'token_blacklist_blacklistedtoken' in query['sql']])
+
+    def test_checks_between_syncs_run_no_query(self):
+        blacklist.might_be_blacklisted('warm-up')
+
+        with self.assertNumQueries(0):
+            self.assertFalse(blacklist.might_be_blacklisted('other'))
+
+    def test_logged_out_token_is_refused(self):
+        token = RefreshToken.for_user(self.user)
+        self.assertEqual(self.refresh(token).status_code, 200)
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.post('/auth/logout/', {'refresh': str(token)}).status_code, 204)
+
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    @override_settings(TOKEN_BLACKLIST_SYNC_INTERVAL=0)
+    def test_picks_up_tokens_blacklisted_by_other_processes(self):
+        token = RefreshToken.for_user(self.user)
+        self.assertEqual(self.refresh(token).status_code, 200)
+
+        # Another worker blacklisted it: the row and the version bump, not this process's filter
+        token.blacklist()
+        cache.incr(blacklist.VERSION_KEY)
+
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_compaction_deletes_expired_tokens_only(self):
+        live = RefreshToken.for_user(self.user)
+        live.blacklist()
+        for _ in range(5):
+            RefreshToken.for_user(self.user).blacklist()
+        OutstandingToken.objects.exclude(jti=live['jti']).update(expires_at=timezone.now() - datetime.timedelta(days=1))
+
+        out = StringIO()
+        call_command('compact_token_blacklist', chunk_size=2, stdout=out)
+
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [live['jti']])
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+        self.assertIn('Done, 5 expired tokens deleted', out.getvalue())
+        self.assertEqual(self.refresh(live).status_code, 401)
+
+    @override_settings(TOKEN_BLACKLIST_SYNC_INTERVAL=0)
+    def test_syncs_do_not_fill_up_the_filter(self):
+        outstanding = OutstandingToken.objects.bulk_create([
+            OutstandingToken(user=self.user, jti=f'jti-{i}', token='', expires_at=timezone.now())
+            for i in range(1500)])
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token_id=token.id) for token in
+                                              OutstandingToken.objects.filter(jti__in=[t.jti for t in outstanding])])
+        blacklist.might_be_blacklisted('warm-up')
+        bloom = blacklist._filter
+
+        for _ in range(120):
+            blacklist.add('jti-1')
+            blacklist.might_be_blacklisted('other')
+
+        self.assertIs(blacklist._filter, bloom)
+        self.assertLessEqual(bloom.count, 1500)
@@ -0,0 +1,62 @@
+from unittest import mock
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from authentication import hashing
+from authentication.models import User
+
+
+class PBKDF2Hasher1000(PBKDF2PasswordHasher):
+    iterations = 1000
+
+
+class PBKDF2Hasher2000(PBKDF2PasswordHasher):
+    iterations = 2000
+
+
+@override_settings(PASSWORD_HASHERS=['authentication.tests.test_hashing.PBKDF2Hasher1000'],
+                   PASSWORD_HASHING_EXECUTOR='thread', PASSWORD_HASHING_WORKERS=2)
+class TestHashing(APITestCase):
+
+    def setUp(self):
+        self.addCleanup(hashing.shutdown)
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password123')
+        User.objects.filter(pk=self.user.pk).update(is_active=True, is_verified=True)
+
+        return super().setUp()
+
+    def login(self, password='password123'):
+        return self.client.post('/auth/login/', {'email': 'alice@example.com', 'password': password})
+
+    def test_registration_hashes_on_the_executor(self):
+        self.assertIsNotNone(hashing._executor)
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(self.user.check_password('password123'))
+
+    def test_login(self):
+        self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(self.login('wrong-password').status_code, 401)
+
+    @override_settings(PASSWORD_HASHING_EXECUTOR='process', PASSWORD_HASHING_WORKERS=1)
+    def test_login_on_a_process_pool(self):
+        self.assertEqual(self.login().status_code, 200)
+
+    def test_hash_is_upgraded_when_iterations_change(self):
+        with override_settings(PASSWORD_HASHERS=['authentication.tests.test_hashing.PBKDF2Hasher2000']):
+            self.assertEqual(authenticate(email='alice@example.com', password='password123'), self.user)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+
+    def test_unknown_email_still_pays_for_a_hash(self):
+        with mock.patch.object(hashing, 'make_password', wraps=hashing.make_password) as make_password:
+            self.assertIsNone(authenticate(email='nobody@example.com', password='password123'))
+
+        make_password.assert_called_once_with('password123')
+
+    @override_settings(PASSWORD_HASHING_MAX_PENDING=0)
+    def test_overload_is_shed_with_503(self):
+        response = self.login()
+
+        self.assertEqual(response.status_code, 503)
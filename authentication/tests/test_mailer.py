@@ -0,0 +1,122 @@
+import smtplib
+import threading
+from unittest import mock
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from authentication import mailer
+from authentication.utils import Util
+
+
+def message(i=0):
+    return EmailMessage(subject=f'Hello {i}', body='Body', to=[f'user{i}@example.com'])
+
+
+@override_settings(EMAIL_POOL_WORKERS=1, EMAIL_QUEUE_SIZE=20, EMAIL_BATCH_SIZE=50, EMAIL_RETRY_BACKOFF=0)
+class TestMailer(APITestCase):
+
+    def setUp(self):
+        self.addCleanup(mailer.shutdown)
+        self.before = mailer.stats()
+
+        return super().setUp()
+
+    def delta(self, metric):
+        return mailer.stats()[metric] - self.before[metric]
+
+    def hold_worker(self):
+        """Makes the worker wait on the returned event before sending what it took."""
+        gate = threading.Event()
+        deliver = mailer._deliver
+
+        def held(messages):
+            if threading.current_thread().name.startswith('email-'):
+                gate.wait(5)
+            return deliver(messages)
+
+        patcher = mock.patch.object(mailer, '_deliver', side_effect=held)
+        deliver_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(gate.set)
+        return gate, deliver_mock
+
+    def test_util_sends_through_the_pool(self):
+        Util.send_email({'email_subject': 'Subject', 'email_body': 'Body', 'email_to': 'alice@example.com'})
+        mailer.flush()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['alice@example.com'])
+        self.assertEqual(self.delta('queued'), 1)
+        self.assertEqual(self.delta('sent'), 1)
+
+    def test_waiting_messages_share_one_connection(self):
+        gate, deliver = self.hold_worker()
+        mailer.send(message())
+        while mailer.stats()['pending']:
+            pass
+        for i in range(10):
+            mailer.send(message(i))
+
+        gate.set()
+        mailer.flush()
+
+        self.assertEqual(len(mail.outbox), 11)
+        self.assertEqual([len(call.args[0]) for call in deliver.call_args_list], [1, 10])
+
+    def test_failed_messages_are_retried(self):
+        send_messages = EmailBackend.send_messages
+        calls = []
+
+        def flaky(backend, messages):
+            calls.append(messages)
+            if len(calls) == 1:
+                raise smtplib.SMTPServerDisconnected()
+            return send_messages(backend, messages)
+
+        with mock.patch.object(EmailBackend, 'send_messages', flaky):
+            mailer.send(message())
+            mailer.flush()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(self.delta('retried'), 1)
+        self.assertEqual(self.delta('failed'), 0)
+
+    @override_settings(EMAIL_MAX_RETRIES=2)
+    def test_gives_up_after_the_last_retry(self):
+        with mock.patch.object(EmailBackend, 'send_messages', side_effect=smtplib.SMTPServerDisconnected()) as send:
+            mailer.send(message())
+            mailer.flush()
+
+        self.assertEqual(send.call_count, 3)
+        self.assertEqual(self.delta('failed'), 1)
+        self.assertEqual(mail.outbox, [])
+
+    @override_settings(EMAIL_QUEUE_SIZE=1, EMAIL_ENQUEUE_TIMEOUT=0.05)
+    def test_full_queue_drops_the_message_without_sending_in_the_caller(self):
+        gate, _ = self.hold_worker()
+        mailer.send(message(1))
+        while mailer.stats()['pending']:
+            pass
+        mailer.send(message(2))
+
+        with self.assertLogs('authentication.mailer', 'ERROR'):
+            self.assertFalse(mailer.send(message(3)))
+
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(self.delta('overflow'), 1)
+
+        gate.set()
+        mailer.flush()
+        self.assertEqual([sent.subject for sent in mail.outbox], ['Hello 1', 'Hello 2'])
+
+    def test_shutdown_delivers_queued_messages(self):
+        for i in range(5):
+            mailer.send(message(i))
+        pool = mailer._pool
+
+        mailer.shutdown()
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(any(thread.is_alive() for thread in pool.threads))
@@ -0,0 +1,131 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from transactions import services
+from authentication import principals
+from authentication.jwt import CachedJWTAuthentication
+from authentication.models import BankAccountType, User, UserBankAccount
+
+
+class PrincipalsTestMixin:
+
+    def setUp(self):
+        cache.clear()
+        principals.clear()
+        self.addCleanup(principals.clear)
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password123')
+        self.user.is_active = True
+        self.user.save()
+        self.account_type = BankAccountType.objects.create(name='Basic', maximum_withdrawal_amount=500)
+        self.account = UserBankAccount.objects.create(
+            user=self.user, account_type=self.account_type, account_no=100, gender='F', balance=100)
+        self.token = str(AccessToken.for_user(self.user))
+
+        return super().setUp()
+
+    def authenticate(self):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        user, _ = CachedJWTAuthentication().authenticate(request)
+        return user
+
+
+class TestCachedJWTAuthentication(PrincipalsTestMixin, APITestCase):
+
+    def test_user_account_and_type_in_one_query_then_none(self):
+        # The stamps (cache table) + the user with its account and account type
+        with self.assertNumQueries(2):
+            user = self.authenticate()
+            self.assertEqual(user.account.account_type.name, 'Basic')
+
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+            self.assertEqual(user.account.balance, 100)
+
+    def test_requests_get_their_own_copy(self):
+        self.authenticate().username = 'changed'
+
+        self.assertEqual(self.authenticate().username, 'alice')
+
+    def test_balance_profile_and_deactivation_drop_the_entry(self):
+        self.authenticate()
+        services.deposit(self.account.id, 50)
+        self.assertEqual(self.authenticate().account.balance, 150)
+
+        self.user.username = 'alice2'
+        self.user.save()
+        self.assertEqual(self.authenticate().username, 'alice2')
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    @override_settings(AUTH_PRINCIPAL_CACHE_SIZE=1)
+    def test_least_recently_used_users_are_evicted(self):
+        self.authenticate()
+        principals.set(999, User(pk=999), principals.stamp(999))
+
+        with self.assertNumQueries(2):
+            self.authenticate()
+
+    @override_settings(AUTH_PRINCIPAL_CACHE_TTL=-1)
+    def test_entries_expire(self):
+        self.authenticate()
+
+        with self.assertNumQueries(2):
+            self.authenticate()
+
+    def test_api_requests_use_the_cache(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.client.get('/transactions/report/')
+
+        with self.assertNumQueries(0):
+            self.authenticate()
+
+
+@override_settings(AUTH_PRINCIPAL_SYNC_INTERVAL=0)
+class TestPrincipalsAcrossProcesses(PrincipalsTestMixin, APITransactionTestCase):
+
+    def write_elsewhere(self, write):
+        """Runs the write as another worker would: only the shared stamp reaches this process."""
+        with mock.patch.object(principals, 'invalidate'):
+            write()
+
+    def test_deactivation_on_another_worker_is_seen(self):
+        self.authenticate()
+
+        def deactivate():
+            self.user.is_active = False
+            self.user.save()
+        self.write_elsewhere(deactivate)
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_balance_change_on_another_worker_is_seen(self):
+        self.authenticate()
+
+        self.write_elsewhere(lambda: services.deposit(self.account.id, 50))
+
+        self.assertEqual(self.authenticate().account.balance, 150)
+
+    def test_account_type_edit_on_another_worker_is_seen(self):
+        self.authenticate()
+
+        def rename():
+            self.account_type.name = 'Gold'
+            self.account_type.save()
+        with mock.patch.object(principals, 'clear'):
+            rename()
+
+        self.assertEqual(self.authenticate().account.account_type.name, 'Gold')
+
+    @override_settings(AUTH_PRINCIPAL_SYNC_INTERVAL=60)
+    def test_stamp_is_not_read_between_checks(self):
+        self.authenticate()
+
+        with self.assertNumQueries(0):
+            self.authenticate()
@@ -0,0 +1,42 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from authentication.models import BankAccountType, User
+
+
+@override_settings(PASSWORD_HASHING_EXECUTOR='inline')
+class TestTokenIssuance(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password123')
+        User.objects.filter(pk=self.user.pk).update(is_active=True, is_verified=True)
+
+        return super().setUp()
+
+    def test_login_mints_one_token_pair(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/auth/login/', {'email': 'alice@example.com', 'password': 'password123'})
+
+        self.assertEqual(response.status_code, 200)
+        user_lookups = [query for query in queries if query['sql'].startswith('SELECT')
+                        and 'FROM "authentication_user"' in query['sql']]
+        self.assertEqual(len(user_lookups), 1)
+
+        outstanding = OutstandingToken.objects.get()
+        refresh = RefreshToken(response.data['tokens']['refresh'])
+        self.assertEqual(refresh['jti'], outstanding.jti)
+        self.assertEqual(AccessToken(response.data['tokens']['access'])['user_id'], self.user.pk)
+
+    def test_registration_issues_no_refresh_token(self):
+        account_type = BankAccountType.objects.create(name='Basic', maximum_withdrawal_amount=500)
+        response = self.client.post('/auth/register/', {
+            'email': 'bob@example.com', 'username': 'bob', 'password': 'password123',
+            'userAddress': {'street_address': 'Rua A', 'city': 'Recife', 'postal_code': 50000, 'country': 'BR'},
+            'userBankAccount': {'account_type': account_type.pk, 'gender': 'M', 'birth_date': '1990-01-01'},
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(OutstandingToken.objects.exists())
@@ -3,13 +3,13 @@ from .views import (
     RegisterView,
     VerifyEmail,
     LoginAPIView,
+    FilteredTokenRefreshView,
     PasswordTokenCheckAPI,
     ResetPasswordEmailAPIView,
     SetNewPasswordAPIView,
     LogoutAPIView,
     AuthUserAPIView,
     UserAddressUpdateAPIView)
-from rest_framework_simplejwt.views import TokenRefreshView
 
 urlpatterns = [
     path('user/', AuthUserAPIView.as_view(), name="user-data"),
@@ -17,7 +17,7 @@ urlpatterns = [
     path('login/', LoginAPIView.as_view(), name="login"),
     path('logout/', LogoutAPIView.as_view(), name="logout"),
     path('email-verify/', VerifyEmail.as_view(), name="email-verify"),
-    path('token/refresh', TokenRefreshView.as_view(), name="token-refresh"),
+    path('token/refresh', FilteredTokenRefreshView.as_view(), name="token-refresh"),
     path('request-reset-password/', ResetPasswordEmailAPIView.as_view(), name="request-reset-password"),
     path('password-reset/<uidb64>/<token>/', PasswordTokenCheckAPI.as_view(), name="password-reset-confirm"),
     path('password-reset-complete/', SetNewPasswordAPIView.as_view(), name="password-reset-complete"),
@@ -1,15 +1,5 @@
 from django.core.mail import EmailMessage
-import threading
-
-
-class EmailThread(threading.Thread):
-
-    def __init__(self, email):
-        self.email = email
-        threading.Thread.__init__(self)
-
-    def run(self):
-        self.email.send()
+from . import mailer
 
 
 class Util:
@@ -19,4 +9,4 @@ class Util:
         email = EmailMessage(subject=data['email_subject'],
                              body=data['email_body'],
                              to=[data['email_to']])
-        EmailThread(email).start()
+        mailer.send(email)
@@ -1,4 +1,5 @@
 from django.conf import settings
+from django.db.models import OuterRef, Subquery
 from django.urls import reverse
 from django.http import HttpResponsePermanentRedirect
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
@@ -8,7 +9,8 @@ from django.contrib.sites.shortcuts import get_current_site
 from rest_framework import generics, status, views
 from rest_framework import permissions
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.views import TokenRefreshView
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from decouple import config
@@ -19,13 +21,16 @@ from .serializers import (
                             ResetPasswordEmailSerializer,
                             SetNewPasswordSerializer,
                             LogoutSerializer,
+                            FilteredTokenRefreshSerializer,
                             UserAddressUpdateSerializer,
                             UserDataSerializer,
                         )
 from .models import User
 from .utils import Util
-from .renderers import UserRender
 from .permissions import IsCurrentUser
+from transactions.models import Transaction
+from utils.conditional import make_etag, not_modified, set_validators
+from utils.renderers import EnvelopeRender
 import jwt
 
 
@@ -44,17 +49,17 @@ class UserAddressUpdateAPIView(generics.UpdateAPIView):
 class RegisterView(generics.GenericAPIView):
 
     serializer_class = RegisterSerializer
-    renderer_classes = (UserRender,)
+    renderer_classes = (EnvelopeRender,)
 
     def post(self, request):
         user = request.data
         serializer = self.serializer_class(data=user)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        user = serializer.save()
         user_data = serializer.data
-        user = User.objects.get(email=user_data['email'])
 
-        token = RefreshToken.for_user(user).access_token
+        # A bare access token: the link needs no refresh token, nor its OutstandingToken row
+        token = AccessToken.for_user(user)
         current_site = get_current_site(request).domain
         relative_link = reverse('email-verify')
 
@@ -104,6 +109,10 @@ class LoginAPIView(generics.GenericAPIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class FilteredTokenRefreshView(TokenRefreshView):
+    serializer_class = FilteredTokenRefreshSerializer
+
+
 class ResetPasswordEmailAPIView(generics.GenericAPIView):
     serializer_class = ResetPasswordEmailSerializer
 
@@ -181,8 +190,27 @@ class LogoutAPIView(generics.GenericAPIView):
 class AuthUserAPIView(generics.RetrieveAPIView):
     queryset = User.objects.all()
     permission_classes = (permissions.IsAuthenticated, )
+    etag_fields = ('account__account_type', 'account__account_no', 'account__gender', 'account__birth_date',
+                   'account__balance', 'address__street_address', 'address__city', 'address__postal_code',
+                   'address__country')
 
     def get(self, request, *args, **kwargs):
+        # Read here rather than from the principal cache, which may be older than an edit made
+        # on another worker. Account fields change without touching updated_at, so they are
+        # part of the ETag; balance changes also come with a new transaction for Last-Modified
+        latest = Transaction.objects.filter(account__user_id=OuterRef('pk')).order_by('-timestamp', '-id')
+        state = self.queryset.filter(pk=request.user.pk).annotate(
+            latest_id=Subquery(latest.values('id')[:1]),
+            latest_timestamp=Subquery(latest.values('timestamp')[:1]),
+        ).values_list('updated_at', 'latest_id', 'latest_timestamp', *self.etag_fields).get()
+        updated_at, latest_id, latest_timestamp = state[:3]
+        last_modified = max(updated_at, latest_timestamp or updated_at)
+        etag = make_etag(request.user.pk, updated_at.isoformat(), latest_id, *state[3:])
+
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
         queryset = self.queryset.get(pk=request.user.pk)
         serializer = UserDataSerializer(queryset)
-        return Response(serializer.data)
+        return set_validators(Response(serializer.data), etag, last_modified)
@@ -0,0 +1,71 @@
+"""
+Compares the previous login token pipeline (a second user lookup and two
+``user.tokens()`` calls) with ``authentication.serializers.LoginSerializer``,
+in logins per second against a throwaway test database.
+
+Passwords are hashed inline with a cheap hasher so the numbers show the token
+work rather than PBKDF2.
+
+    python -m benchmarks.login
+"""
+import os
+import timeit
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from django.contrib import auth  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken  # noqa: E402
+from authentication.models import User  # noqa: E402
+from authentication.serializers import LoginSerializer  # noqa: E402
+
+CREDENTIALS = {'email': 'bench@example.com', 'password': 'password123'}
+
+
+def legacy_login(data):
+    user = auth.authenticate(**data)
+    user = User.objects.get(email=user.email)
+    return {
+        'id': user.id,
+        'email': user.email,
+        'username': user.username,
+        'tokens': {'access': user.tokens()['access'], 'refresh': user.tokens()['refresh']},
+    }
+
+
+def login(data):
+    serializer = LoginSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    return serializer.data
+
+
+def run(function, number):
+    OutstandingToken.objects.all().delete()
+    seconds = timeit.timeit(lambda: function(CREDENTIALS), number=number)
+    return number / seconds, OutstandingToken.objects.count() / number
+
+
+def main(number=500):
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+                               PASSWORD_HASHING_EXECUTOR='inline'):
+            user = User.objects.create_user('bench', CREDENTIALS['email'], CREDENTIALS['password'])
+            User.objects.filter(pk=user.pk).update(is_active=True, is_verified=True)
+
+            legacy, legacy_rows = run(legacy_login, number)
+            single, single_rows = run(login, number)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(f'lookup + 2x tokens(): {legacy:8.0f} logins/s, {legacy_rows:.0f} OutstandingToken rows/login')
+    print(f'LoginSerializer:      {single:8.0f} logins/s, {single_rows:.0f} OutstandingToken rows/login '
+          f'({single / legacy:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Compares the legacy ``str(data)`` renderer with ``utils.renderers.EnvelopeRender``
+on a 1,000-row transaction report page.
+
+    python -m benchmarks.renderers
+"""
+import datetime
+import json
+import os
+import timeit
+from collections import OrderedDict
+from decimal import Decimal
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from rest_framework.response import Response  # noqa: E402
+from rest_framework.utils.serializer_helpers import ReturnList  # noqa: E402
+from utils.renderers import EnvelopeRender  # noqa: E402
+
+
+def legacy_render(data):
+    if 'ErrorDetail' in str(data):
+        return json.dumps({'errors': data})
+    return json.dumps({'data': data})
+
+
+def report_page(rows=1000):
+    timestamp = datetime.datetime(2021, 1, 14, 12, 0, tzinfo=datetime.timezone.utc)
+    results = ReturnList([
+        OrderedDict([('id', pk), ('account', 1), ('timestamp', (timestamp + datetime.timedelta(seconds=pk)).isoformat()),
+                     ('amount', str(Decimal('10.50') + pk)), ('balance_after_transaction', str(Decimal(1000 + pk))),
+                     ('transaction_type', pk % 4 + 1), ('sender_user_name', f'user{pk}')])
+        for pk in range(rows)
+    ], serializer=None)
+    return OrderedDict([('next', 'http://testserver/transactions/report/?cursor=cD0yMDIx'), ('previous', None),
+                        ('results', results)])
+
+
+def main(number=200):
+    data = report_page()
+    renderer = EnvelopeRender()
+    context = {'response': Response(data)}
+
+    assert json.loads(renderer.render(data, renderer_context=context)) == json.loads(legacy_render(data))
+
+    legacy = timeit.timeit(lambda: legacy_render(data), number=number) / number
+    envelope = timeit.timeit(lambda: renderer.render(data, renderer_context=context), number=number) / number
+
+    print(f'legacy str(data) + json.dumps: {legacy * 1000:.2f} ms/page')
+    print(f'EnvelopeRender:                {envelope * 1000:.2f} ms/page ({legacy / envelope:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
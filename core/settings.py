@@ -28,6 +28,8 @@ INSTALLED_APPS = [
     'expenses',
     'incomes',
     'userdashboard',
+    'statements',
+    'search',
 ]
 
 SWAGGER_SETTINGS = {
@@ -78,13 +80,22 @@ DATABASES = {
     }
 }
 
+# Shared by every worker: idempotency keys, report pages, the token blacklist version and the
+# authenticated user stamps rely on it. Create the table with `python manage.py createcachetable`.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_entries',
+    }
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
     'NON_FIELD_ERRORS_KEY': 'error',
     'EXCEPTION_HANDLER': 'utils.exceptionhandler.custom_exception_handler',
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.jwt.CachedJWTAuthentication',
     )
 }
 
@@ -127,7 +138,45 @@ EMAIL_HOST = config('EMAIL_HOST')
 EMAIL_PORT = config('EMAIL_PORT')
 EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
+EMAIL_POOL_WORKERS = 2
+EMAIL_QUEUE_SIZE = 1000
+# Seconds a request waits for room in a full queue before its email is dropped
+EMAIL_ENQUEUE_TIMEOUT = 0.5
+EMAIL_BATCH_SIZE = 50
+EMAIL_MAX_RETRIES = 3
+EMAIL_RETRY_BACKOFF = 1
 
 ACCOUNT_NUMBER_START_FROM = 100
 MINIMUM_DEPOSIT_AMOUNT = 10
 MINIMUM_WITHDRAWAL_AMOUNT = 10
+REPORT_TIME_ZONE = 'America/Sao_Paulo'
+STATEMENT_EXPORT_CHUNK_SIZE = 2000
+REPORT_CACHE_TIMEOUT = 60 * 5
+MAX_BATCH_TRANSFER_SIZE = 500
+MAX_BULK_OPERATIONS = 500
+STATEMENT_IMPORT_CHUNK_SIZE = 2000
+# None picks FTS5Backend on SQLite and LikeBackend on other databases
+SEARCH_BACKEND = None
+AUTH_PRINCIPAL_CACHE_TTL = 30
+AUTH_PRINCIPAL_CACHE_SIZE = 10000
+# Seconds between two checks of a cached user's stamp, how long other workers may miss a write
+AUTH_PRINCIPAL_SYNC_INTERVAL = 1
+TOKEN_BLACKLIST_BLOOM_CAPACITY = 100000
+TOKEN_BLACKLIST_BLOOM_ERROR_RATE = 0.001
+# Seconds between two reads of the blacklist version, how long other workers may miss a logout
+TOKEN_BLACKLIST_SYNC_INTERVAL = 5
+TOKEN_BLACKLIST_COMPACT_CHUNK_SIZE = 1000
+
+AUTHENTICATION_BACKENDS = ['authentication.backends.HashingModelBackend']
+PASSWORD_HASHING_EXECUTOR = 'process'
+PASSWORD_HASHING_WORKERS = None
+PASSWORD_HASHING_MAX_PENDING = 32
+DASHBOARD_OVERVIEW_WORKERS = 4
+DASHBOARD_OVERVIEW_TRANSACTIONS = 30
+DASHBOARD_SNAPSHOT_WINDOWS = (7, 30, 90, 365)
+CASH_FLOW_MAX_BUCKETS = 1000
+
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+IDEMPOTENCY_WAIT_TIMEOUT = 10
+IDEMPOTENCY_POLL_INTERVAL = 0.05
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Expense
+from .models import Budget, Expense, MonthlyCategorySpending
 
 
 admin.site.register(Expense)
+admin.site.register(Budget)
+admin.site.register(MonthlyCategorySpending)
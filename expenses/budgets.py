@@ -0,0 +1,74 @@
+"""
+Incremental maintenance of ``MonthlyCategorySpending``.
+
+Every expense write calls ``record`` in the same transaction, with the rows
+that leave the totals (deleted rows, the old state of updated ones) and the
+rows that enter them. Budget status then reads one total per category and
+month instead of summing the month's expenses.
+
+Writes that bypass the API (admin, shell, raw SQL) are not tracked, the
+``rebuild_budget_totals`` command recomputes the table from the expenses.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from .models import Budget, MonthlyCategorySpending
+
+
+def month_of(date):
+    return date.replace(day=1)
+
+
+def _key(expense):
+    return expense.owner_id, expense.category, month_of(expense.date)
+
+
+def record(removed=(), added=()):
+    """Applies the rows to the running totals; returns the touched ``(owner_id, category, month)`` keys."""
+    deltas = defaultdict(lambda: [Decimal(0), 0])
+    for expense in removed:
+        deltas[_key(expense)][0] -= expense.amount
+        deltas[_key(expense)][1] -= 1
+    for expense in added:
+        deltas[_key(expense)][0] += expense.amount
+        deltas[_key(expense)][1] += 1
+
+    for (owner_id, category, month), (amount, count) in deltas.items():
+        if not amount and not count:
+            continue
+
+        row = MonthlyCategorySpending.objects.filter(owner_id=owner_id, category=category, month=month)
+        if not row.update(total=F('total') + amount, count=F('count') + count):
+            try:
+                with transaction.atomic():
+                    MonthlyCategorySpending.objects.create(
+                        owner_id=owner_id, category=category, month=month, total=amount, count=count)
+            except IntegrityError:
+                # Someone else created the row between our update and insert
+                row.update(total=F('total') + amount, count=F('count') + count)
+
+    return list(deltas)
+
+
+def money(value):
+    return str(Decimal(value).quantize(Decimal('0.01')))
+
+
+def status(keys):
+    """Returns the budget, amount spent and remaining budget of every ``(owner_id, category, month)`` key."""
+    result = []
+    for owner_id, category, month in sorted(keys, key=lambda key: (key[2], key[1])):
+        budget = Budget.objects.filter(owner_id=owner_id, category=category, month=month) \
+            .values_list('amount', flat=True).first()
+        spent = MonthlyCategorySpending.objects.filter(owner_id=owner_id, category=category, month=month) \
+            .values_list('total', flat=True).first()
+        spent = Decimal(0) if spent is None else spent
+        result.append({
+            'category': category,
+            'month': month.strftime('%Y-%m'),
+            'budget': None if budget is None else money(budget),
+            'spent': money(spent),
+            'remaining': None if budget is None else money(budget - spent),
+        })
+    return result
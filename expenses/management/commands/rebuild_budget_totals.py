@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from authentication.models import User
+from expenses.models import Expense, MonthlyCategorySpending
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the monthly per-category spending totals behind budgets from the expenses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200,
+                            help='Number of users rebuilt per database transaction')
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help='Only rebuild this user id (can be repeated)')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id').values_list('id', flat=True)
+        if options['users']:
+            users = users.filter(id__in=options['users'])
+
+        last_id = 0
+        rebuilt = 0
+        while True:
+            chunk = list(users.filter(id__gt=last_id)[:options['chunk_size']])
+            if not chunk:
+                break
+
+            with transaction.atomic():
+                # Writers update existing rows in place, lock them so none lands between delete and insert
+                list(MonthlyCategorySpending.objects.select_for_update().filter(owner_id__in=chunk)
+                     .values_list('id', flat=True))
+                MonthlyCategorySpending.objects.filter(owner_id__in=chunk).delete()
+                MonthlyCategorySpending.objects.bulk_create(self.totals(chunk), batch_size=1000)
+
+            last_id = chunk[-1]
+            rebuilt += len(chunk)
+            self.stdout.write(f'Rebuilt {rebuilt} users')
+
+        self.stdout.write(self.style.SUCCESS(f'Done, {rebuilt} users rebuilt'))
+
+    def totals(self, owner_ids):
+        rows = Expense.objects.filter(owner_id__in=owner_ids).order_by() \
+            .values('owner_id', 'category', month=TruncMonth('date')) \
+            .annotate(total=Sum('amount'), count=Count('id'))
+
+        for row in rows.iterator():
+            yield MonthlyCategorySpending(
+                owner_id=row['owner_id'], category=row['category'], month=row['month'],
+                total=row['total'], count=row['count'])
@@ -16,9 +16,53 @@ class Expense(models.Model):
     description = models.TextField()
     owner = models.ForeignKey(to=User, on_delete=models.CASCADE)
     date = models.DateField(null=False, blank=False)
+    # Set on rows created by a statement import, so importing the same lines again skips them
+    import_hash = models.CharField(max_length=64, null=True, blank=True, editable=False)
 
     class Meta:
-        ordering: ['-date']
+        ordering = ['-date', '-id']
+        indexes = [
+            models.Index(fields=['owner', '-date', '-id'], name='expense_owner_date_idx'),
+            models.Index(fields=['owner', 'category', 'date'], name='expense_owner_cat_date_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'import_hash'], name='%(app_label)s_import_hash_unique'),
+        ]
 
     def __str__(self):
         return str(self.owner) + ' ' + str(self.date)
+
+
+class Budget(models.Model):
+    owner = models.ForeignKey(to=User, on_delete=models.CASCADE, related_name='budgets')
+    category = models.CharField(choices=Expense.CATEGORY_OPTIONS, max_length=255)
+    # First day of the month the budget applies to
+    month = models.DateField()
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        ordering = ['-month', 'category']
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'category', 'month'], name='budget_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.owner} {self.category} {self.month:%Y-%m}'
+
+
+class MonthlyCategorySpending(models.Model):
+    """Running total of a user's expenses per category and month, kept by ``expenses.budgets``."""
+    owner = models.ForeignKey(to=User, on_delete=models.CASCADE, related_name='monthly_spending')
+    category = models.CharField(choices=Expense.CATEGORY_OPTIONS, max_length=255)
+    month = models.DateField()
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-month', 'category']
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'category', 'month'], name='monthly_spending_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.owner} {self.category} {self.month:%Y-%m}'
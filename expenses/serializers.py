@@ -1,5 +1,7 @@
+from decimal import Decimal
 from rest_framework import serializers
-from .models import Expense
+from .budgets import money, month_of
+from .models import Budget, Expense, MonthlyCategorySpending
 
 
 class ExpenseSerializer(serializers.ModelSerializer):
@@ -7,3 +9,41 @@ class ExpenseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Expense
         fields = ['id', 'date', 'description', 'amount', 'category']
+
+
+class BudgetSerializer(serializers.ModelSerializer):
+    month = serializers.DateField(format='%Y-%m', input_formats=['%Y-%m', 'iso-8601'])
+    spent = serializers.SerializerMethodField()
+    remaining = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Budget
+        fields = ['id', 'category', 'month', 'amount', 'spent', 'remaining']
+
+    def validate_month(self, value):
+        return month_of(value)
+
+    def validate(self, attrs):
+        owner = self.context['request'].user
+        category = attrs.get('category', getattr(self.instance, 'category', None))
+        month = attrs.get('month', getattr(self.instance, 'month', None))
+        others = Budget.objects.filter(owner=owner, category=category, month=month)
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if others.exists():
+            raise serializers.ValidationError(f'There is already a {category} budget for {month:%Y-%m}')
+        return attrs
+
+    def _spent(self, budget):
+        # List and detail views annotate it, freshly saved budgets look it up
+        if not hasattr(budget, 'spent'):
+            budget.spent = MonthlyCategorySpending.objects.filter(
+                owner_id=budget.owner_id, category=budget.category, month=budget.month
+            ).values_list('total', flat=True).first()
+        return Decimal(0) if budget.spent is None else budget.spent
+
+    def get_spent(self, budget):
+        return money(self._spent(budget))
+
+    def get_remaining(self, budget):
+        return money(budget.amount - self._spent(budget))
@@ -1,3 +1,266 @@
-from django.test import TestCase
+import datetime
+import io
+from decimal import Decimal
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase, APITransactionTestCase
+from authentication.models import User
+from userdashboard.models import DashboardSnapshot
+from .models import Budget, Expense, MonthlyCategorySpending
 
-# Create your tests here.
+
+class ExpenseTestMixin:
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password123')
+        self.other_user = User.objects.create_user('bob', 'bob@example.com', 'password123')
+        self.client.force_authenticate(self.user)
+        self.today = datetime.date.today()
+
+        return super().setUp()
+
+    def create_expense(self, owner, amount, category='FOOD'):
+        return Expense.objects.create(owner=owner, category=category, amount=amount, description='', date=self.today)
+
+    def new_expense(self, amount, category='FOOD'):
+        return {'date': self.today.isoformat(), 'description': 'lunch', 'amount': str(amount), 'category': category}
+
+
+class TestBulkExpenses(ExpenseTestMixin, APITestCase):
+
+    def test_creates_updates_and_deletes_in_one_request(self):
+        kept = self.create_expense(self.user, 10)
+        removed = self.create_expense(self.user, 20)
+
+        response = self.client.post('/expenses/bulk/', {
+            'create': [self.new_expense(5), self.new_expense(7, 'BUS')],
+            'update': [{'id': kept.id, 'amount': '12.50'}],
+            'delete': [removed.id],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        created = Expense.objects.exclude(id=kept.id).order_by('id')
+        self.assertEqual([row['id'] for row in response.data['created']], [row.id for row in created])
+        self.assertEqual([row['category'] for row in response.data['created']], [row.category for row in created])
+        self.assertEqual(response.data['updated'][0]['amount'], '12.50')
+        self.assertEqual(response.data['deleted'], [removed.id])
+        self.assertEqual(sorted(Expense.objects.values_list('amount', flat=True)),
+                         [Decimal('5'), Decimal('7'), Decimal('12.50')])
+        self.assertEqual(Expense.objects.get(id=kept.id).category, 'FOOD')
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        def run(size):
+            rows = [self.create_expense(self.user, 1) for _ in range(size * 2)]
+            body = {
+                'create': [self.new_expense(1) for _ in range(size)],
+                'update': [{'id': row.id, 'amount': '2'} for row in rows[:size]],
+                'delete': [row.id for row in rows[size:]],
+            }
+            with self.assertNumQueries(10):
+                # locked in_bulk, delete, bulk_update, bulk_create, the created ids and the budget total
+                # inside a savepoint, then the budget and spending of the one (category, month) touched
+                self.assertEqual(self.client.post('/expenses/bulk/', body, format='json').status_code, 200)
+
+        # Creates this month's spending row
+        self.client.post('/expenses/', self.new_expense(1), format='json')
+        run(2)
+        run(50)
+
+    def test_someone_elses_row_fails_the_whole_batch(self):
+        mine = self.create_expense(self.user, 10)
+        theirs = self.create_expense(self.other_user, 10)
+
+        for body in ({'update': [{'id': theirs.id, 'amount': '1'}]}, {'delete': [mine.id, theirs.id]}):
+            with self.subTest(body=body):
+                response = self.client.post(
+                    '/expenses/bulk/', {'create': [self.new_expense(5)], **body}, format='json')
+
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(Expense.objects.count(), 2)
+                self.assertEqual(Expense.objects.get(id=theirs.id).amount, Decimal('10'))
+
+    def test_invalid_item_rejects_the_batch(self):
+        response = self.client.post('/expenses/bulk/', {
+            'create': [self.new_expense(5), {'amount': '1', 'category': 'NOPE'}],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Expense.objects.exists())
+
+    def test_id_cannot_be_updated_and_deleted(self):
+        expense = self.create_expense(self.user, 10)
+
+        response = self.client.post('/expenses/bulk/', {
+            'update': [{'id': expense.id, 'amount': '1'}], 'delete': [expense.id],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(MAX_BULK_OPERATIONS=2)
+    def test_batch_size_is_limited(self):
+        response = self.client.post('/expenses/bulk/', {
+            'create': [self.new_expense(1) for _ in range(3)],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 406)
+
+
+class TestExpenseList(ExpenseTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.lunch = self.create_expense(self.user, 30)
+        self.bus = self.create_expense(self.user, 5, 'BUS')
+        self.old = Expense.objects.create(
+            owner=self.user, category='FOOD', amount=80, description='', date=self.today - datetime.timedelta(days=40))
+        self.create_expense(self.other_user, 30)
+
+    def ids(self, **params):
+        response = self.client.get('/expenses/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def plan(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/expenses/', params)
+        select = next(query['sql'] for query in queries if query['sql'].startswith('SELECT "expenses_expense"."id"'))
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + select)
+            return ' / '.join(row[-1] for row in cursor.fetchall())
+
+    def test_default_ordering_is_newest_first(self):
+        self.assertEqual(self.ids(), [self.bus.id, self.lunch.id, self.old.id])
+
+    def test_filters(self):
+        self.assertEqual(self.ids(category='FOOD'), [self.lunch.id, self.old.id])
+        self.assertEqual(self.ids(category=['FOOD', 'BUS'], date_from=self.today.isoformat()),
+                         [self.bus.id, self.lunch.id])
+        self.assertEqual(self.ids(date_to=(self.today - datetime.timedelta(days=1)).isoformat()), [self.old.id])
+        self.assertEqual(self.ids(amount_min='10', amount_max='50'), [self.lunch.id])
+
+    def test_invalid_filter_is_rejected(self):
+        self.assertEqual(self.client.get('/expenses/', {'category': 'CAR'}).status_code, 400)
+        self.assertEqual(self.client.get('/expenses/', {'date_from': 'yesterday'}).status_code, 400)
+
+    def test_list_walks_the_owner_date_index(self):
+        plan = self.plan(date_from=self.today.isoformat(), amount_min='1')
+
+        self.assertIn('expense_owner_date_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_category_filter_uses_the_category_index(self):
+        plan = self.plan(category='FOOD', date_from=self.today.isoformat())
+
+        self.assertIn('expense_owner_cat_date_idx', plan)
+
+
+class TestExpenseDetail(ExpenseTestMixin, APITestCase):
+
+    def test_delete_drops_dashboard_snapshots(self):
+        expense = self.create_expense(self.user, 10)
+        DashboardSnapshot.objects.create(
+            owner=self.user, kind='EXPENSE', window=30, computed_on=self.today, watermark=expense.id)
+
+        self.assertEqual(self.client.delete(f'/expenses/{expense.id}').status_code, 204)
+        self.assertFalse(DashboardSnapshot.objects.exists())
+
+
+class TestBudgets(ExpenseTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.month = self.today.replace(day=1)
+        Budget.objects.create(owner=self.user, category='FOOD', month=self.month, amount=100)
+
+    def spending(self, category='FOOD'):
+        row = MonthlyCategorySpending.objects.filter(owner=self.user, category=category, month=self.month).first()
+        return (row.total, row.count) if row else None
+
+    def test_every_write_returns_the_remaining_budget(self):
+        response = self.client.post('/expenses/', self.new_expense(30), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['budget'], [{
+            'category': 'FOOD', 'month': self.month.strftime('%Y-%m'), 'budget': '100.00', 'spent': '30.00',
+            'remaining': '70.00'}])
+
+        expense_id = response.data['id']
+        response = self.client.patch(f'/expenses/{expense_id}', {'category': 'BUS'}, format='json')
+        self.assertEqual([(b['category'], b['spent'], b['remaining']) for b in response.data['budget']],
+                         [('BUS', '30.00', None), ('FOOD', '0.00', '100.00')])
+
+        self.client.delete(f'/expenses/{expense_id}')
+        self.assertEqual(self.spending('BUS'), (Decimal('0'), 0))
+
+    def test_bulk_writes_keep_the_totals(self):
+        kept = self.client.post('/expenses/', self.new_expense(10), format='json').data['id']
+        removed = self.client.post('/expenses/', self.new_expense(20), format='json').data['id']
+
+        response = self.client.post('/expenses/bulk/', {
+            'create': [self.new_expense(5), self.new_expense(7)],
+            'update': [{'id': kept, 'amount': '12.50'}],
+            'delete': [removed],
+        }, format='json')
+
+        self.assertEqual(response.data['budget'][0]['remaining'], '75.50')
+        self.assertEqual(self.spending(), (Decimal('24.50'), 3))
+
+    def test_rows_deleted_elsewhere_fail_the_batch(self):
+        removed = self.client.post('/expenses/', self.new_expense(20), format='json').data['id']
+
+        # As if a detail DELETE had removed the row after it was read
+        with mock.patch('django.db.models.query.QuerySet.delete', return_value=(0, {})):
+            response = self.client.post('/expenses/bulk/', {
+                'create': [self.new_expense(5)], 'delete': [removed]}, format='json')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.spending(), (Decimal('20'), 1))
+        self.assertEqual(Expense.objects.count(), 1)
+
+    def test_status_never_sums_the_month(self):
+        for _ in range(3):
+            self.client.post('/expenses/', self.new_expense(1), format='json')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post('/expenses/', self.new_expense(1), format='json')
+            self.client.get('/expenses/budgets/')
+
+        self.assertFalse([query for query in queries if 'SUM(' in query['sql'].upper()])
+
+    def test_budget_list_shows_spent_and_remaining(self):
+        self.client.post('/expenses/', self.new_expense(40), format='json')
+
+        response = self.client.get('/expenses/budgets/', {'month': self.month.strftime('%Y-%m')})
+
+        budget = response.data['results'][0]
+        self.assertEqual((budget['month'], budget['spent'], budget['remaining']),
+                         (self.month.strftime('%Y-%m'), '40.00', '60.00'))
+
+    def test_one_budget_per_category_and_month(self):
+        response = self.client.post('/expenses/budgets/', {
+            'category': 'FOOD', 'month': self.month.strftime('%Y-%m'), 'amount': '50'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_rebuild_recovers_from_drift(self):
+        self.client.post('/expenses/', self.new_expense(30), format='json')
+        self.create_expense(self.user, 15)
+        MonthlyCategorySpending.objects.update(total=999)
+
+        call_command('rebuild_budget_totals', stdout=io.StringIO())
+
+        self.assertEqual(self.spending(), (Decimal('45'), 2))
+
+
+class TestBulkExpensesSnapshots(ExpenseTestMixin, APITransactionTestCase):
+
+    def test_bulk_changes_drop_dashboard_snapshots(self):
+        expense = self.create_expense(self.user, 10)
+        DashboardSnapshot.objects.create(
+            owner=self.user, kind='EXPENSE', window=30, computed_on=self.today, watermark=expense.id)
+
+        self.client.post('/expenses/bulk/', {'update': [{'id': expense.id, 'amount': '1'}]}, format='json')
+
+        self.assertFalse(DashboardSnapshot.objects.exists())
@@ -1,7 +1,11 @@
 from django.urls import path
-from .views import ExpenseListAPIView, ExpenseDetailAPIView
+from .views import (ExpenseListAPIView, ExpenseDetailAPIView, ExpenseBulkAPIView, BudgetListAPIView,
+                    BudgetDetailAPIView)
 
 urlpatterns = [
     path('', ExpenseListAPIView.as_view(), name="expenses"),
     path('<int:id>', ExpenseDetailAPIView.as_view(), name="expense"),
+    path('bulk/', ExpenseBulkAPIView.as_view(), name="expenses-bulk"),
+    path('budgets/', BudgetListAPIView.as_view(), name="budgets"),
+    path('budgets/<int:id>', BudgetDetailAPIView.as_view(), name="budget"),
 ]
@@ -1,20 +1,33 @@
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import DecimalField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
-from rest_framework import permissions
-from .serializers import ExpenseSerializer
-from .models import Expense
+from rest_framework import permissions, serializers
+from utils.bulk import BulkOwnedAPIView, bulk_changed
+from utils.listfilters import OwnedListFilterMixin
+from . import budgets
+from .serializers import BudgetSerializer, ExpenseSerializer
+from .models import Budget, Expense, MonthlyCategorySpending
 from .permissions import IsOwner
 
 
-class ExpenseListAPIView(ListCreateAPIView):
+class ExpenseListAPIView(OwnedListFilterMixin, ListCreateAPIView):
     serializer_class = ExpenseSerializer
     queryset = Expense.objects.all()
     permission_classes = (permissions.IsAuthenticated, )
+    choice_field = 'category'
 
-    def perform_create(self, serializer):
-        return serializer.save(owner=self.request.user)
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.data['budget'] = budgets.status(self.budget_keys)
+        return response
 
-    def get_queryset(self):
-        return self.queryset.filter(owner=self.request.user)
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            expense = serializer.save(owner=self.request.user)
+            self.budget_keys = budgets.record(added=[expense])
+        return expense
 
 
 class ExpenseDetailAPIView(RetrieveUpdateDestroyAPIView):
@@ -25,3 +38,63 @@ class ExpenseDetailAPIView(RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         return self.queryset.filter(owner=self.request.user)
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        response.data['budget'] = budgets.status(self.budget_keys)
+        return response
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            # Locked, so a concurrent edit can't make both writers subtract the same old amount
+            previous = Expense.objects.select_for_update().get(pk=serializer.instance.pk)
+            expense = serializer.save()
+            self.budget_keys = budgets.record(removed=[previous], added=[expense])
+
+    def perform_destroy(self, instance):
+        instance_id = instance.id
+        with transaction.atomic():
+            budgets.record(removed=[Expense.objects.select_for_update().get(pk=instance_id)])
+            instance.delete()
+        bulk_changed.send(sender=Expense, owner_id=instance.owner_id, updated=[], deleted=[instance_id])
+
+
+class ExpenseBulkAPIView(BulkOwnedAPIView):
+    serializer_class = ExpenseSerializer
+
+    def bulk_written(self, removed, added):
+        return {'budget': budgets.status(budgets.record(removed, added))}
+
+
+class BudgetQuerysetMixin:
+
+    def get_queryset(self):
+        spent = MonthlyCategorySpending.objects.filter(
+            owner=OuterRef('owner'), category=OuterRef('category'), month=OuterRef('month')).values('total')[:1]
+        return self.queryset.filter(owner=self.request.user).annotate(
+            spent=Coalesce(Subquery(spent), Value(Decimal(0)),
+                           output_field=DecimalField(max_digits=14, decimal_places=2)))
+
+
+class BudgetListAPIView(BudgetQuerysetMixin, ListCreateAPIView):
+    """The user's budgets with what was spent and what remains, ``?month=YYYY-MM`` narrows to one month."""
+    serializer_class = BudgetSerializer
+    queryset = Budget.objects.all()
+    permission_classes = (permissions.IsAuthenticated, )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if 'month' in self.request.query_params:
+            month = serializers.DateField(input_formats=['%Y-%m']).run_validation(self.request.query_params['month'])
+            queryset = queryset.filter(month=month)
+        return queryset
+
+    def perform_create(self, serializer):
+        return serializer.save(owner=self.request.user)
+
+
+class BudgetDetailAPIView(BudgetQuerysetMixin, RetrieveUpdateDestroyAPIView):
+    serializer_class = BudgetSerializer
+    queryset = Budget.objects.all()
+    permission_classes = (permissions.IsAuthenticated, IsOwner, )
+    lookup_field = "id"
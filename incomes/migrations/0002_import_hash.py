@@ -0,0 +1,22 @@
+# Generated by Django 3.1.4 on 2026-10-18 19:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incomes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='income',
+            name='import_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='income',
+            constraint=models.UniqueConstraint(fields=('owner', 'import_hash'), name='incomes_import_hash_unique'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.1.4 on 2026-10-18 20:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incomes', '0002_import_hash'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='income',
+            options={'ordering': ['-date', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='income',
+            index=models.Index(fields=['owner', '-date', '-id'], name='income_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='income',
+            index=models.Index(fields=['owner', 'source', 'date'], name='income_owner_src_date_idx'),
+        ),
+    ]
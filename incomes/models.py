@@ -14,9 +14,18 @@ class Income(models.Model):
     description = models.TextField()
     owner = models.ForeignKey(to=User, on_delete=models.CASCADE)
     date = models.DateField(null=False, blank=False)
+    # Set on rows created by a statement import, so importing the same lines again skips them
+    import_hash = models.CharField(max_length=64, null=True, blank=True, editable=False)
 
     class Meta:
-        ordering: ['-date']
+        ordering = ['-date', '-id']
+        indexes = [
+            models.Index(fields=['owner', '-date', '-id'], name='income_owner_date_idx'),
+            models.Index(fields=['owner', 'source', 'date'], name='income_owner_src_date_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'import_hash'], name='%(app_label)s_import_hash_unique'),
+        ]
 
     def __str__(self):
         return str(self.owner) + ' ' + str(self.date)
@@ -1,3 +1,40 @@
-from django.test import TestCase
+import datetime
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from authentication.models import User
+from .models import Income
 
-# Create your tests here.
+
+class TestBulkIncomes(APITestCase):
+
+    def test_bulk_endpoint_only_touches_own_incomes(self):
+        user = User.objects.create_user('alice', 'alice@example.com', 'password123')
+        income = Income.objects.create(
+            owner=user, source='SALARY', amount=100, description='', date=datetime.date.today())
+        self.client.force_authenticate(user)
+
+        response = self.client.post('/incomes/bulk/', {
+            'create': [{'date': datetime.date.today().isoformat(), 'description': 'job',
+                        'amount': '50', 'source': 'BUSINESS'}],
+            'delete': [income.id],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(Income.objects.values_list('source', flat=True)), ['BUSINESS'])
+
+    def test_source_filter_uses_the_source_index(self):
+        user = User.objects.create_user('alice', 'alice@example.com', 'password123')
+        today = datetime.date.today()
+        for source in ('SALARY', 'BUSINESS'):
+            Income.objects.create(owner=user, source=source, amount=100, description='', date=today)
+        self.client.force_authenticate(user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/incomes/', {'source': 'SALARY', 'date_from': today.isoformat()})
+
+        self.assertEqual([row['source'] for row in response.data['results']], ['SALARY'])
+        select = next(query['sql'] for query in queries if query['sql'].startswith('SELECT "incomes_income"."id"'))
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + select)
+            self.assertIn('income_owner_src_date_idx', ' / '.join(row[-1] for row in cursor.fetchall()))
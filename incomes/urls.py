@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import IncomeListAPIView, IncomeDetailAPIView
+from .views import IncomeListAPIView, IncomeDetailAPIView, IncomeBulkAPIView
 
 urlpatterns = [
     path('', IncomeListAPIView.as_view(), name="incomes"),
     path('<int:id>', IncomeDetailAPIView.as_view(), name="income"),
+    path('bulk/', IncomeBulkAPIView.as_view(), name="incomes-bulk"),
 ]
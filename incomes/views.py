@@ -1,21 +1,21 @@
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework import permissions
+from utils.bulk import BulkOwnedAPIView, bulk_changed
+from utils.listfilters import OwnedListFilterMixin
 from .serializers import IncomeSerializer
 from .models import Income
 from .permissions import IsOwner
 
 
-class IncomeListAPIView(ListCreateAPIView):
+class IncomeListAPIView(OwnedListFilterMixin, ListCreateAPIView):
     serializer_class = IncomeSerializer
     queryset = Income.objects.all()
     permission_classes = (permissions.IsAuthenticated, )
+    choice_field = 'source'
 
     def perform_create(self, serializer):
         return serializer.save(owner=self.request.user)
 
-    def get_queryset(self):
-        return self.queryset.filter(owner=self.request.user)
-
 
 class IncomeDetailAPIView(RetrieveUpdateDestroyAPIView):
     serializer_class = IncomeSerializer
@@ -25,3 +25,12 @@ class IncomeDetailAPIView(RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         return self.queryset.filter(owner=self.request.user)
+
+    def perform_destroy(self, instance):
+        instance_id = instance.id
+        instance.delete()
+        bulk_changed.send(sender=Income, owner_id=instance.owner_id, updated=[], deleted=[instance_id])
+
+
+class IncomeBulkAPIView(BulkOwnedAPIView):
+    serializer_class = IncomeSerializer
@@ -0,0 +1,99 @@
+"""
+Full-text search backends for expense and income descriptions.
+
+``get_backend()`` returns the backend named by ``SEARCH_BACKEND``, or when it
+is unset ``FTS5Backend`` on SQLite and ``LikeBackend`` elsewhere. A backend
+only answers ``search()`` with ``(id, rank)`` pairs, best first; keeping its
+index current is its own business.
+
+``FTS5Backend`` uses an external-content FTS5 table per model, filled by
+triggers on the model's table (see the migrations), so every write path stays
+in sync, ``bulk_create`` and admin edits included. ``LikeBackend`` works on
+any database and is there for development databases without FTS5.
+"""
+import functools
+import re
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.utils.module_loading import import_string
+
+WORD = re.compile(r'\w+')
+
+
+class SearchBackend:
+    # Database vendors the backend works on, None for any
+    vendors = None
+
+    def search(self, model, owner_id, query, date_from=None, date_to=None, limit=20, offset=0):
+        """Returns up to ``limit`` ``(id, rank)`` pairs of ``owner_id``'s rows matching ``query``, best first."""
+        raise NotImplementedError
+
+
+class FTS5Backend(SearchBackend):
+    # The migration only creates the FTS5 tables on SQLite
+    vendors = ('sqlite',)
+
+    @staticmethod
+    def table(model):
+        return f'{model._meta.db_table}_fts'
+
+    @staticmethod
+    def match_expression(owner_id, query):
+        # Every word is quoted, so user input can't inject FTS5 syntax, and matched as a prefix
+        words = ' '.join(f'"{word}"*' for word in WORD.findall(query))
+        # Matching the owner through the index keeps the cost to the user's own rows
+        return f'owner_id : "{int(owner_id)}" AND description : ({words})'
+
+    def search(self, model, owner_id, query, date_from=None, date_to=None, limit=20, offset=0):
+        if not WORD.search(query):
+            return []
+
+        table, fts = model._meta.db_table, self.table(model)
+        sql = [f'SELECT row.id, bm25({fts}) AS rank FROM {fts} JOIN {table} row ON row.id = {fts}.rowid',
+               f'WHERE {fts} MATCH %s']
+        params = [self.match_expression(owner_id, query)]
+        if date_from is not None:
+            sql.append('AND row.date >= %s')
+            params.append(date_from)
+        if date_to is not None:
+            sql.append('AND row.date <= %s')
+            params.append(date_to)
+        sql.append('ORDER BY rank, row.date DESC LIMIT %s OFFSET %s')
+        params += [limit, offset]
+
+        with connection.cursor() as cursor:
+            cursor.execute(' '.join(sql), params)
+            return cursor.fetchall()
+
+
+class LikeBackend(SearchBackend):
+    """Every word must appear in the description, newest first. Scans the user's rows."""
+
+    def search(self, model, owner_id, query, date_from=None, date_to=None, limit=20, offset=0):
+        words = WORD.findall(query)
+        if not words:
+            return []
+
+        rows = model.objects.filter(owner_id=owner_id)
+        for word in words:
+            rows = rows.filter(description__icontains=word)
+        if date_from is not None:
+            rows = rows.filter(date__gte=date_from)
+        if date_to is not None:
+            rows = rows.filter(date__lte=date_to)
+
+        ids = rows.order_by('-date', '-id').values_list('id', flat=True)[offset:offset + limit]
+        return [(id, 0) for id in ids]
+
+
+@functools.lru_cache(maxsize=None)
+def get_backend():
+    path = settings.SEARCH_BACKEND
+    if path is None:
+        path = 'search.backends.FTS5Backend' if connection.vendor == 'sqlite' else 'search.backends.LikeBackend'
+
+    backend = import_string(path)()
+    if backend.vendors is not None and connection.vendor not in backend.vendors:
+        raise ImproperlyConfigured(f'SEARCH_BACKEND {path} does not work on {connection.vendor}')
+    return backend
@@ -0,0 +1,51 @@
+from django.db import migrations
+
+TABLES = ('expenses_expense', 'incomes_income')
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    for table in TABLES:
+        fts = f'{table}_fts'
+        row = 'description, owner_id, date'
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5(description, owner_id, date UNINDEXED, "
+            f"content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')")
+        schema_editor.execute(
+            f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {row}) VALUES (new.id, new.description, new.owner_id, new.date); END")
+        schema_editor.execute(
+            f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {row}) "
+            f"VALUES ('delete', old.id, old.description, old.owner_id, old.date); END")
+        schema_editor.execute(
+            f"CREATE TRIGGER {fts}_update AFTER UPDATE OF {row} ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {row}) "
+            f"VALUES ('delete', old.id, old.description, old.owner_id, old.date); "
+            f"INSERT INTO {fts}(rowid, {row}) VALUES (new.id, new.description, new.owner_id, new.date); END")
+        schema_editor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    for table in TABLES:
+        fts = f'{table}_fts'
+        for trigger in ('insert', 'delete', 'update'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {fts}_{trigger}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {fts}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0002_import_hash'),
+        ('incomes', '0002_import_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,108 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from authentication.models import User
+from expenses.models import Expense
+from incomes.models import Income
+from .backends import FTS5Backend, LikeBackend, get_backend
+
+
+class SearchTestSetUp(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password123')
+        self.other_user = User.objects.create_user('bob', 'bob@example.com', 'password123')
+        self.client.force_authenticate(self.user)
+        self.today = datetime.date.today()
+
+        self.coffee = self.expense('Café da manhã na padaria', days_ago=1)
+        self.market = self.expense('Supermercado do mês', days_ago=10)
+        self.bonus = Income.objects.create(
+            owner=self.user, source='SALARY', amount=100, description='Bônus padaria', date=self.today)
+        self.expense('Padaria do bairro', owner=self.other_user)
+
+        return super().setUp()
+
+    def expense(self, description, days_ago=0, owner=None):
+        return Expense.objects.create(
+            owner=owner or self.user, category='FOOD', amount=Decimal('10'), description=description,
+            date=self.today - datetime.timedelta(days=days_ago))
+
+    def search(self, **params):
+        return self.client.get('/search/', params).data['results']
+
+
+class TestFTS5Search(SearchTestSetUp):
+
+    def test_prefix_and_accent_insensitive_matches(self):
+        results = self.search(q='cafe padar')
+
+        self.assertEqual([(result['type'], result['id']) for result in results], [('expense', self.coffee.id)])
+
+    def test_searches_expenses_and_incomes_of_the_user_only(self):
+        results = self.search(q='padaria')
+
+        self.assertEqual({(result['type'], result['id']) for result in results},
+                         {('expense', self.coffee.id), ('income', self.bonus.id)})
+
+    def test_filters_by_type_and_date(self):
+        self.assertEqual([r['id'] for r in self.search(q='padaria', type='income')], [self.bonus.id])
+        self.assertEqual(self.search(q='mercado', date_from=self.today - datetime.timedelta(days=5)), [])
+        self.assertEqual([r['id'] for r in self.search(q='supermercado', date_to=self.today)], [self.market.id])
+
+    def test_index_follows_updates_deletes_and_bulk_creates(self):
+        self.coffee.description = 'Almoço'
+        self.coffee.save()
+        self.market.delete()
+        Expense.objects.bulk_create([
+            Expense(owner=self.user, category='BUS', amount=1, description='Uber para casa', date=self.today)])
+
+        self.assertEqual(self.search(q='cafe'), [])
+        self.assertEqual(self.search(q='supermercado'), [])
+        self.assertEqual(len(self.search(q='almoco')), 1)
+        self.assertEqual(len(self.search(q='uber')), 1)
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search(q='padaria" OR owner_id : "2'), [])
+        self.assertEqual(self.search(q='***'), [])
+
+    def test_match_expression_restricts_the_owner(self):
+        self.assertEqual(FTS5Backend.match_expression(7, 'café na'),
+                         'owner_id : "7" AND description : ("café"* "na"*)')
+
+
+@override_settings(SEARCH_BACKEND='search.backends.LikeBackend')
+class TestLikeSearch(SearchTestSetUp):
+
+    def setUp(self):
+        get_backend.cache_clear()
+        self.addCleanup(get_backend.cache_clear)
+        return super().setUp()
+
+    def test_fallback_backend(self):
+        self.assertIsInstance(get_backend(), LikeBackend)
+        self.assertEqual({r['id'] for r in self.search(q='padaria', type='expense')}, {self.coffee.id})
+
+
+class TestBackendChoice(SearchTestSetUp):
+
+    def setUp(self):
+        get_backend.cache_clear()
+        self.addCleanup(get_backend.cache_clear)
+        return super().setUp()
+
+    def test_default_follows_the_database(self):
+        self.assertIsInstance(get_backend(), FTS5Backend)
+
+        get_backend.cache_clear()
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            self.assertIsInstance(get_backend(), LikeBackend)
+
+    @override_settings(SEARCH_BACKEND='search.backends.FTS5Backend')
+    def test_fts5_on_another_database_is_a_configuration_error(self):
+        with mock.patch.object(connection, 'vendor', 'postgresql'), self.assertRaises(ImproperlyConfigured):
+            get_backend()
@@ -0,0 +1,54 @@
+from rest_framework import permissions, serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from expenses.models import Expense
+from expenses.serializers import ExpenseSerializer
+from incomes.models import Income
+from incomes.serializers import IncomeSerializer
+from .backends import get_backend
+
+KINDS = {
+    'expense': (Expense, ExpenseSerializer),
+    'income': (Income, IncomeSerializer),
+}
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField()
+    type = serializers.ChoiceField(choices=list(KINDS), required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+    offset = serializers.IntegerField(min_value=0, default=0)
+
+
+class SearchAPIView(APIView):
+    """Searches the descriptions of the user's expenses and incomes, best matches first."""
+    permission_classes = (permissions.IsAuthenticated, )
+
+    def get(self, request):
+        params = SearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        kinds = [params['type']] if 'type' in params else list(KINDS)
+        backend = get_backend()
+        # Each kind may fill the whole page, the merged ranking decides which rows stay
+        window = params['offset'] + params['limit']
+
+        matches = []
+        for kind in kinds:
+            model = KINDS[kind][0]
+            matches += [(rank, kind, id) for id, rank in backend.search(
+                model, request.user.pk, params['q'], params.get('date_from'), params.get('date_to'), limit=window)]
+        matches = sorted(matches, key=lambda match: match[0])[params['offset']:window]
+
+        results = []
+        for kind in kinds:
+            model, serializer_class = KINDS[kind]
+            rows = model.objects.in_bulk([id for _, match_kind, id in matches if match_kind == kind])
+            results += [{'type': kind, 'rank': rank, **serializer_class(rows[id]).data}
+                        for rank, match_kind, id in matches if match_kind == kind and id in rows]
+        results.sort(key=lambda result: result['rank'])
+
+        return Response({'results': results}, status=status.HTTP_200_OK)
@@ -0,0 +1,129 @@
+"""
+Imports parsed statement lines as expenses (negative amounts) and incomes.
+
+Lines are hashed as they stream by and written in chunks of
+``STATEMENT_IMPORT_CHUNK_SIZE``: one query finds which hashes the user
+already has, one ``bulk_create`` per model writes the rest. Memory holds a
+single chunk whatever the size of the file.
+"""
+import hashlib
+import itertools
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from expenses import budgets
+from expenses.models import Expense
+from incomes.models import Income
+from .parsers import PARSERS, InvalidLine
+
+# First keyword found in the description wins, otherwise OTHERS
+CATEGORY_KEYWORDS = (
+    ('ONLINE_SERVICES', ('NETFLIX', 'SPOTIFY', 'AMAZON', 'GOOGLE', 'APPLE.COM', 'STEAM')),
+    ('BUS', ('UBER', '99APP', '99 TAXI', 'ONIBUS', 'ÔNIBUS', 'METRO', 'METRÔ', 'BILHETE UNICO')),
+    ('FOOD', ('IFOOD', 'RESTAURANTE', 'PADARIA', 'MERCADO', 'SUPERMERCADO', 'LANCHONETE')),
+    ('RENT', ('ALUGUEL', 'CONDOMINIO', 'CONDOMÍNIO', 'RENT')),
+)
+SOURCE_KEYWORDS = (
+    ('SALARY', ('SALARIO', 'SALÁRIO', 'SALARY', 'FOLHA', 'PAGTO SALARIO')),
+    ('BUSINESS', ('VENDA', 'PIX RECEBIDO', 'TED RECEBIDA', 'BOLETO RECEBIDO')),
+)
+CATEGORIES = {value for value, _ in Expense.CATEGORY_OPTIONS}
+SOURCES = {value for value, _ in Income.SOURCE_OPTIONS}
+MAX_ERROR_SAMPLES = 20
+
+
+def _classify(line, options, keywords):
+    if line.category in options:
+        return line.category
+
+    description = line.description.upper()
+    for value, words in keywords:
+        if any(word in description for word in words):
+            return value
+    return 'OTHERS'
+
+
+def _hashed(lines, result):
+    """
+    Pairs every valid line with its import hash: the bank's FITID when there is
+    one, otherwise date, amount, description and how many identical lines came
+    before it that day, so two equal coffees on the same day both get in.
+
+    Statements come in date order, so only the current day is counted.
+    """
+    current_date = None
+    seen = {}
+    for line in lines:
+        if isinstance(line, InvalidLine):
+            result['errors'] += 1
+            if len(result['error_samples']) < MAX_ERROR_SAMPLES:
+                result['error_samples'].append(f'Line {line.line_number}: {line.message}')
+            continue
+
+        result['read'] += 1
+        if line.fitid:
+            key = f'fitid|{line.fitid}'
+        else:
+            if line.date != current_date:
+                current_date, seen = line.date, {}
+            identity = (line.amount, line.description)
+            seen[identity] = seen.get(identity, 0) + 1
+            key = f'{line.date.isoformat()}|{line.amount}|{line.description}|{seen[identity]}'
+
+        yield hashlib.sha256(key.encode()).hexdigest(), line
+
+
+def _store(owner, chunk, result):
+    expenses = {}
+    incomes = {}
+    for import_hash, line in chunk:
+        if line.amount < 0:
+            expenses[import_hash] = Expense(
+                owner=owner, import_hash=import_hash, date=line.date, description=line.description,
+                amount=-line.amount, category=_classify(line, CATEGORIES, CATEGORY_KEYWORDS))
+        elif line.amount > 0:
+            incomes[import_hash] = Income(
+                owner=owner, import_hash=import_hash, date=line.date, description=line.description,
+                amount=line.amount, source=_classify(line, SOURCES, SOURCE_KEYWORDS))
+
+    with transaction.atomic():
+        for model, rows, counter in ((Expense, expenses, 'expenses'), (Income, incomes, 'incomes')):
+            if not rows:
+                continue
+            owned = model.objects.filter(owner=owner)
+            while True:
+                existing = set(owned.filter(import_hash__in=list(rows)).values_list('import_hash', flat=True))
+                new_rows = [row for import_hash, row in rows.items() if import_hash not in existing]
+                try:
+                    with transaction.atomic():
+                        model.objects.bulk_create(new_rows)
+                    break
+                except IntegrityError:
+                    # A concurrent import stored some of these lines first: look again, so only
+                    # the rows really inserted here are counted and added to the budgets
+                    if not owned.filter(import_hash__in=[row.import_hash for row in new_rows]).exists():
+                        raise
+            if model is Expense:
+                budgets.record(added=new_rows)
+            result[counter] += len(new_rows)
+            result['duplicates'] += len(existing)
+
+
+def import_statement(owner, lines, file_format, chunk_size=None, progress=None):
+    """
+    Imports the statement in ``lines`` for ``owner`` and returns the counts of
+    lines read, expenses and incomes created, duplicates skipped and errors.
+    ``progress`` is called with the counts so far after every chunk.
+    """
+    chunk_size = chunk_size or settings.STATEMENT_IMPORT_CHUNK_SIZE
+    result = {'read': 0, 'expenses': 0, 'incomes': 0, 'duplicates': 0, 'errors': 0, 'error_samples': []}
+
+    hashed = _hashed(PARSERS[file_format](lines), result)
+    while True:
+        chunk = list(itertools.islice(hashed, chunk_size))
+        if not chunk:
+            break
+        _store(owner, chunk, result)
+        if progress is not None:
+            progress(dict(result))
+
+    return result
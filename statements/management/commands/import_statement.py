@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from authentication.models import User
+from statements.importer import import_statement
+from statements.parsers import PARSERS
+
+
+class Command(BaseCommand):
+    help = 'Imports a CSV or OFX bank statement as expenses and incomes of a user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Statement file')
+        parser.add_argument('--user', required=True, help='Email of the owner')
+        parser.add_argument('--format', choices=list(PARSERS), help='Guessed from the extension when omitted')
+        parser.add_argument('--encoding', default='utf-8-sig')
+        parser.add_argument('--chunk-size', type=int, help='Lines written per database transaction')
+
+    def handle(self, *args, **options):
+        try:
+            owner = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user with email {options["user"]}')
+
+        file_format = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if file_format not in PARSERS:
+            raise CommandError(f'Unknown format {file_format}, use --format')
+
+        def progress(result):
+            self.stdout.write(f'Read {result["read"]} lines, {result["duplicates"]} duplicates')
+
+        with open(options['path'], encoding=options['encoding'], errors='replace', newline='') as lines:
+            result = import_statement(owner, lines, file_format, options['chunk_size'], progress)
+
+        for sample in result['error_samples']:
+            self.stderr.write(sample)
+        self.stdout.write(self.style.SUCCESS(
+            f'Done, {result["expenses"]} expenses and {result["incomes"]} incomes created, '
+            f'{result["duplicates"]} duplicates skipped, {result["errors"]} invalid lines'))
@@ -0,0 +1,121 @@
+"""
+Line-by-line parsers for bank statements.
+
+Parsers take any iterable of text lines (an open file, a decoded upload) and
+yield one ``StatementLine`` per transaction, or an ``InvalidLine`` for rows
+that can't be read, without ever holding more than one transaction in memory.
+"""
+import csv
+import datetime
+import itertools
+import re
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+
+StatementLine = namedtuple('StatementLine', ['line_number', 'date', 'description', 'amount', 'category', 'fitid'])
+InvalidLine = namedtuple('InvalidLine', ['line_number', 'message'])
+
+CSV_COLUMNS = {
+    'date': ('date', 'data'),
+    'description': ('description', 'descricao', 'descrição', 'historico', 'histórico', 'memo'),
+    'amount': ('amount', 'valor', 'value'),
+    'category': ('category', 'categoria', 'source', 'fonte'),
+}
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d/%m/%y', '%Y%m%d')
+
+
+def parse_date(value):
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value.strip(), date_format).date()
+        except ValueError:
+            pass
+    raise ValueError(f'Invalid date: {value!r}')
+
+
+def parse_amount(value):
+    value = value.strip().replace('R$', '').replace(' ', '')
+    if value.rfind(',') > value.rfind('.'):
+        # 1.234,56
+        value = value.replace('.', '').replace(',', '.')
+    else:
+        value = value.replace(',', '')
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f'Invalid amount: {value!r}')
+
+
+def parse_csv(lines):
+    """Reads ``date,description,amount[,category]`` rows; ``;`` separators and Portuguese headers work too."""
+    lines = iter(lines)
+    header = next(lines, '')
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+    rows = csv.reader(itertools.chain([header], lines), delimiter=delimiter)
+
+    names = [name.strip().lower() for name in next(rows, [])]
+    positions = {}
+    for column, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in names:
+                positions[column] = names.index(alias)
+                break
+
+    missing = {'date', 'description', 'amount'} - set(positions)
+    if missing:
+        yield InvalidLine(1, f'Missing columns: {", ".join(sorted(missing))}')
+        return
+
+    for line_number, row in enumerate(rows, 2):
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            yield StatementLine(
+                line_number=line_number,
+                date=parse_date(row[positions['date']]),
+                description=row[positions['description']].strip(),
+                amount=parse_amount(row[positions['amount']]),
+                category=row[positions['category']].strip().upper() if 'category' in positions else '',
+                fitid='',
+            )
+        except (IndexError, ValueError) as error:
+            yield InvalidLine(line_number, str(error) or 'Missing columns')
+
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def parse_ofx(lines):
+    """Reads the ``<STMTTRN>`` blocks of an OFX file, SGML (1.x) or XML (2.x)."""
+    transaction = None
+    for line_number, line in enumerate(lines, 1):
+        for closing, tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if closing and transaction is not None:
+                    yield _ofx_line(transaction, line_number)
+                transaction = None if closing else {}
+            elif transaction is not None and not closing and value.strip():
+                transaction[tag] = value.strip()
+
+
+def _ofx_line(transaction, line_number):
+    try:
+        return StatementLine(
+            line_number=line_number,
+            date=parse_date(transaction['DTPOSTED'][:8]),
+            description=transaction.get('MEMO') or transaction.get('NAME', ''),
+            amount=parse_amount(transaction['TRNAMT']),
+            category='',
+            fitid=transaction.get('FITID', ''),
+        )
+    except KeyError as error:
+        return InvalidLine(line_number, f'Missing {error.args[0]}')
+    except ValueError as error:
+        return InvalidLine(line_number, str(error))
+
+
+PARSERS = {
+    'csv': parse_csv,
+    'ofx': parse_ofx,
+}
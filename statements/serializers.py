@@ -0,0 +1,26 @@
+import codecs
+from rest_framework import serializers
+from .parsers import PARSERS
+
+
+class StatementImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=list(PARSERS), required=False)
+    encoding = serializers.CharField(required=False, default='utf-8-sig')
+    import_id = serializers.UUIDField(required=False)
+
+    def validate_encoding(self, value):
+        try:
+            codecs.lookup(value)
+        except LookupError:
+            raise serializers.ValidationError(f'Unknown encoding: {value}')
+        return value
+
+    def validate(self, attrs):
+        if 'format' not in attrs:
+            extension = attrs['file'].name.rsplit('.', 1)[-1].lower()
+            if extension not in PARSERS:
+                raise serializers.ValidationError(
+                    {'format': f'Could not guess the format from the file name, use one of: {", ".join(PARSERS)}'})
+            attrs['format'] = extension
+        return attrs
@@ -0,0 +1,178 @@
+import datetime
+import io
+import os
+import tempfile
+import uuid
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet, Sum
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from authentication.models import User
+from expenses.models import Expense, MonthlyCategorySpending
+from incomes.models import Income
+from .importer import import_statement
+from .parsers import InvalidLine, parse_csv, parse_ofx
+
+CSV_STATEMENT = """data;descricao;valor
+01/03/2021;IFOOD *RESTAURANTE;-45,90
+01/03/2021;CAFE;-5,00
+01/03/2021;CAFE;-5,00
+02/03/2021;SALARIO EMPRESA X;3.500,00
+03/03/2021;UBER TRIP;-18,30
+04/03/2021;ALGO;abc
+"""
+
+OFX_STATEMENT = """OFXHEADER:100
+DATA:OFXSGML
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20210305120000[-3:BRT]
+<TRNAMT>-39.90
+<FITID>A1
+<MEMO>NETFLIX.COM
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20210306<TRNAMT>100.00<FITID>A2<NAME>PIX RECEBIDO</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+class TestParsers(TestCase):
+
+    def test_csv_reads_brazilian_dates_amounts_and_headers(self):
+        lines = list(parse_csv(io.StringIO(CSV_STATEMENT)))
+
+        self.assertEqual(lines[0].date, datetime.date(2021, 3, 1))
+        self.assertEqual(lines[0].amount, Decimal('-45.90'))
+        self.assertEqual(lines[3].amount, Decimal('3500.00'))
+        self.assertIsInstance(lines[-1], InvalidLine)
+        self.assertEqual(lines[-1].line_number, 7)
+
+    def test_csv_without_required_columns(self):
+        lines = list(parse_csv(io.StringIO('date,amount\n2021-03-01,10\n')))
+
+        self.assertEqual(lines, [InvalidLine(1, 'Missing columns: description')])
+
+    def test_ofx_reads_sgml_blocks(self):
+        lines = list(parse_ofx(io.StringIO(OFX_STATEMENT)))
+
+        self.assertEqual([(line.fitid, line.amount, line.description) for line in lines], [
+            ('A1', Decimal('-39.90'), 'NETFLIX.COM'), ('A2', Decimal('100.00'), 'PIX RECEBIDO')])
+        self.assertEqual(lines[0].date, datetime.date(2021, 3, 5))
+
+
+class TestImport(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password123')
+
+    def test_lines_become_expenses_and_incomes(self):
+        result = import_statement(self.user, io.StringIO(CSV_STATEMENT), 'csv')
+
+        self.assertEqual((result['read'], result['expenses'], result['incomes'], result['errors']), (5, 4, 1, 1))
+        self.assertEqual(sorted(Expense.objects.values_list('category', 'amount')), [
+            ('BUS', Decimal('18.30')), ('FOOD', Decimal('45.90')), ('OTHERS', Decimal('5.00')),
+            ('OTHERS', Decimal('5.00'))])
+        self.assertEqual(Income.objects.get().source, 'SALARY')
+
+    def test_importing_again_skips_every_line(self):
+        import_statement(self.user, io.StringIO(CSV_STATEMENT), 'csv')
+        result = import_statement(self.user, io.StringIO(CSV_STATEMENT), 'csv')
+
+        self.assertEqual((result['expenses'], result['incomes'], result['duplicates']), (0, 0, 5))
+        self.assertEqual(Expense.objects.count(), 4)
+
+    def test_concurrent_import_of_the_same_lines_is_not_counted(self):
+        # The other import's row, its budget total left out
+        import_statement(self.user, io.StringIO('\n'.join(CSV_STATEMENT.splitlines()[:2])), 'csv')
+        MonthlyCategorySpending.objects.all().delete()
+        values_list = QuerySet.values_list
+        raced = []
+
+        def racing_values_list(queryset, *fields, **kwargs):
+            if queryset.model is Expense and fields == ('import_hash',) and not raced:
+                # Another import commits the first line between this lookup and the insert
+                raced.append(True)
+                return []
+            return values_list(queryset, *fields, **kwargs)
+
+        with mock.patch.object(QuerySet, 'values_list', racing_values_list):
+            result = import_statement(self.user, io.StringIO(CSV_STATEMENT), 'csv')
+
+        self.assertEqual((result['expenses'], result['duplicates']), (3, 1))
+        self.assertEqual(Expense.objects.count(), 4)
+        # Only the rows this import inserted reach the budget totals
+        self.assertEqual(MonthlyCategorySpending.objects.aggregate(total=Sum('total'))['total'], Decimal('28.30'))
+
+    def test_query_count_depends_on_chunks_not_lines(self):
+        def statement(size):
+            yield 'date,description,amount\n'
+            for line in range(size):
+                date = datetime.date(2021, 1, line % 28 + 1)
+                yield f'{date},MERCADO {line},-10\n'
+                yield f'{date},SALARIO {line},100\n'
+
+        def queries(owner, size):
+            progress = []
+            with CaptureQueriesContext(connection) as captured:
+                import_statement(owner, statement(size), 'csv', chunk_size=size * 2 // 3, progress=progress.append)
+            self.assertEqual([entry['read'] for entry in progress], [size * 2 // 3 * chunk for chunk in (1, 2, 3)])
+            return len(captured)
+
+        self.assertEqual(queries(self.user, 60), queries(User.objects.create_user('bob', 'bob@x.com', 'p'), 210))
+        self.assertEqual(Expense.objects.count(), 270)
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ofx', delete=False) as statement:
+            statement.write(OFX_STATEMENT)
+        self.addCleanup(os.remove, statement.name)
+
+        out = io.StringIO()
+        call_command('import_statement', statement.name, '--user', 'alice@example.com', stdout=out)
+
+        self.assertIn('1 expenses and 1 incomes created', out.getvalue())
+        self.assertEqual(Expense.objects.get().category, 'ONLINE_SERVICES')
+        self.assertEqual(Income.objects.get().source, 'BUSINESS')
+
+
+class TestImportAPI(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password123')
+        self.client.force_authenticate(self.user)
+
+    def test_upload_and_progress(self):
+        import_id = uuid.uuid4()
+        upload = SimpleUploadedFile('extrato.csv', CSV_STATEMENT.encode('utf-8-sig'))
+
+        response = self.client.post('/statements/import/', {'file': upload, 'import_id': str(import_id)})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['expenses'], response.data['incomes']), (4, 1))
+        progress = self.client.get(f'/statements/import/{import_id}/')
+        self.assertEqual(progress.data['read'], 5)
+        self.assertTrue(progress.data['done'])
+
+    def test_unknown_extension_needs_a_format(self):
+        upload = SimpleUploadedFile('extrato.txt', b'date,description,amount\n')
+
+        response = self.client.post('/statements/import/', {'file': upload})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_progress_of_someone_else_is_hidden(self):
+        other = User.objects.create_user('bob', 'bob@example.com', 'password123')
+        import_id = uuid.uuid4()
+        self.client.post('/statements/import/', {
+            'file': SimpleUploadedFile('extrato.ofx', OFX_STATEMENT.encode()), 'import_id': str(import_id)})
+
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(f'/statements/import/{import_id}/').status_code, 404)
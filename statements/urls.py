@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import StatementImportAPIView, StatementImportProgressAPIView
+
+urlpatterns = [
+    path('import/', StatementImportAPIView.as_view(), name="statement-import"),
+    path('import/<uuid:import_id>/', StatementImportProgressAPIView.as_view(), name="statement-import-progress"),
+]
@@ -0,0 +1,56 @@
+import io
+import uuid
+from django.core.cache import cache
+from rest_framework import permissions, status
+from rest_framework.exceptions import NotFound
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .importer import import_statement
+from .serializers import StatementImportSerializer
+
+PROGRESS_TIMEOUT = 60 * 60
+
+
+def _progress_key(user_id, import_id):
+    return f'statement-import:{user_id}:{import_id}'
+
+
+class StatementImportAPIView(APIView):
+    """
+    Imports a CSV or OFX statement as expenses and incomes. Pass an
+    ``import_id`` to follow the progress from ``import/<import_id>/`` meanwhile.
+    """
+    parser_classes = (MultiPartParser, )
+    permission_classes = (permissions.IsAuthenticated, )
+
+    def post(self, request):
+        serializer = StatementImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        import_id = data.get('import_id') or uuid.uuid4()
+        key = _progress_key(request.user.pk, import_id)
+
+        def progress(result):
+            cache.set(key, {**result, 'done': False}, PROGRESS_TIMEOUT)
+
+        # Uploads above FILE_UPLOAD_MAX_MEMORY_SIZE are already on disk, read them a line at a time
+        lines = io.TextIOWrapper(data['file'].file, encoding=data['encoding'], errors='replace', newline='')
+        try:
+            result = import_statement(request.user, lines, data['format'], progress=progress)
+        finally:
+            lines.detach()
+
+        cache.set(key, {**result, 'done': True}, PROGRESS_TIMEOUT)
+        return Response({'import_id': import_id, **result}, status=status.HTTP_201_CREATED)
+
+
+class StatementImportProgressAPIView(APIView):
+    permission_classes = (permissions.IsAuthenticated, )
+
+    def get(self, request, import_id):
+        result = cache.get(_progress_key(request.user.pk, import_id))
+        if result is None:
+            raise NotFound()
+        return Response(result)
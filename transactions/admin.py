@@ -1,4 +1,5 @@
 from django.contrib import admin
-from .models import Transaction
+from .models import Transaction, DailyAccountSummary
 
 admin.site.register(Transaction)
+admin.site.register(DailyAccountSummary)
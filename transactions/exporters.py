@@ -0,0 +1,52 @@
+import csv
+import json
+from django.conf import settings
+from django.utils import timezone
+from utils.timeranges import report_timezone
+
+STATEMENT_FIELDS = ['id', 'timestamp', 'transaction_type', 'amount', 'balance_after_transaction', 'sender_user_name']
+
+
+class Echo:
+    """File-like object for ``csv.writer`` that hands each line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def _rows(queryset):
+    tz = report_timezone()
+    rows = queryset.order_by('timestamp', 'id').values_list(*STATEMENT_FIELDS).iterator(
+        chunk_size=settings.STATEMENT_EXPORT_CHUNK_SIZE)
+
+    for pk, timestamp, transaction_type, amount, balance, sender_user_name in rows:
+        yield pk, timezone.localtime(timestamp, tz).isoformat(), transaction_type, str(amount), str(balance), \
+            sender_user_name or ''
+
+
+def _buffered(lines):
+    # Yielding one row at a time makes a network write per row; group them instead
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= settings.STATEMENT_EXPORT_CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def csv_statement(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow(STATEMENT_FIELDS)
+    yield from _buffered(writer.writerow(row) for row in _rows(queryset))
+
+
+def ndjson_statement(queryset):
+    yield from _buffered(json.dumps(dict(zip(STATEMENT_FIELDS, row))) + '\n' for row in _rows(queryset))
+
+
+EXPORTERS = {
+    'csv': (csv_statement, 'text/csv; charset=utf-8'),
+    'ndjson': (ndjson_statement, 'application/x-ndjson; charset=utf-8'),
+}
@@ -0,0 +1,137 @@
+"""
+Cumulative hourly/daily limits on money leaving an account.
+
+Withdrawals and outgoing transfers are counted in sliding windows made of
+fixed sub-buckets (an hour is 12 buckets of 5 minutes, a day is 24 buckets of
+an hour) kept in the account's ``AccountDebitUsage`` row. A debit reads that
+row once in ``check`` and writes it back once in ``record``, instead of
+running a ``SUM()`` over the day's transactions. The oldest bucket is counted
+whole, so a window can only err on the strict side.
+
+Both run while the caller holds the account row lock, so the next debit of
+the account can't read the counters in between, and the write rolls back
+with the debit. When an account has no row yet, the buckets are rebuilt from
+the last day of transactions.
+"""
+import datetime
+import time
+from django.utils import timezone
+from rest_framework.exceptions import NotAcceptable
+from .models import AccountDebitUsage, Transaction
+from .constants import WITHDRAWAL, TRANSFER_MONEY
+
+DEBIT_TYPES = (WITHDRAWAL, TRANSFER_MONEY)
+
+# name: (window length in seconds, number of buckets)
+WINDOWS = {
+    'hourly': (60 * 60, 12),
+    'daily': (24 * 60 * 60, 24),
+}
+
+
+def _limits(account_type):
+    limits = {
+        'hourly': (account_type.hourly_amount_limit, account_type.hourly_count_limit),
+        'daily': (account_type.daily_amount_limit, account_type.daily_count_limit),
+    }
+    if all(limit is None for pair in limits.values() for limit in pair):
+        return None
+    return limits
+
+
+def _cents(amount):
+    return int(round(amount * 100))
+
+
+def _bucket_index(window, timestamp):
+    length, buckets = WINDOWS[window]
+    return int(timestamp // (length // buckets))
+
+
+def _bucket_indexes(window, now):
+    current = _bucket_index(window, now)
+    return range(current - WINDOWS[window][1] + 1, current + 1)
+
+
+def _from_ledger(account_id, now):
+    """Rebuilds every window of the account from the last day of transactions."""
+    since = timezone.now() - datetime.timedelta(seconds=max(length for length, _ in WINDOWS.values()))
+    rows = Transaction.objects.filter(
+        account_id=account_id, timestamp__gte=since, transaction_type__in=DEBIT_TYPES
+    ).values_list('timestamp', 'amount')
+
+    buckets = {window: {} for window in WINDOWS}
+    for timestamp, amount in rows:
+        for window in WINDOWS:
+            index = _bucket_index(window, timestamp.timestamp())
+            if index in _bucket_indexes(window, now):
+                bucket = buckets[window].setdefault(str(index), [0, 0])
+                bucket[0] += _cents(amount)
+                bucket[1] += 1
+    return buckets
+
+
+def _load(account, now):
+    """The account's counters, read once per debit and kept on the locked account for ``record``."""
+    usage = getattr(account, '_debit_usage', None)
+    if usage is None:
+        usage = AccountDebitUsage.objects.filter(account_id=account.id).first()
+        if usage is None:
+            usage = AccountDebitUsage(account_id=account.id, buckets=_from_ledger(account.id, now))
+        account._debit_usage = usage
+    return usage
+
+
+def _usage(usage, now):
+    """Returns ``{window: (amount in cents, count)}`` for the account."""
+    totals = {}
+    for window in WINDOWS:
+        buckets = usage.buckets.get(window, {})
+        current = [buckets.get(str(index), (0, 0)) for index in _bucket_indexes(window, now)]
+        totals[window] = (sum(cents for cents, _ in current), sum(count for _, count in current))
+    return totals
+
+
+def check(account, amount, count=1):
+    """Raises ``NotAcceptable`` if debiting ``amount`` in ``count`` operations would exceed a limit."""
+    limits = _limits(account.account_type)
+    if limits is None:
+        return
+
+    now = time.time()
+    usage = _usage(_load(account, now), now)
+    for window, (amount_limit, count_limit) in limits.items():
+        used_cents, used_count = usage[window]
+
+        if amount_limit is not None and used_cents + _cents(amount) > _cents(amount_limit):
+            remaining = max(_cents(amount_limit) - used_cents, 0) / 100
+            raise NotAcceptable(
+                f'You have reached your {window} limit of R$ {amount_limit}, you can still move R$ {remaining:.2f}')
+
+        if count_limit is not None and used_count + count > count_limit:
+            raise NotAcceptable(f'You have reached your {window} limit of {count_limit} operations')
+
+
+def record(account, amount, count=1):
+    """Adds a debit to the account's counters, the caller must hold the account row lock."""
+    if _limits(account.account_type) is None:
+        # Nothing is counted while there are no limits, rebuild from the ledger if some are set later
+        AccountDebitUsage.objects.filter(account_id=account.id).delete()
+        account._debit_usage = None
+        return
+
+    now = time.time()
+    usage = _load(account, now)
+    for window in WINDOWS:
+        current = {str(index) for index in _bucket_indexes(window, now)}
+        # Buckets that left the window are dropped, so the row stays a few dozen entries
+        buckets = {index: bucket for index, bucket in usage.buckets.get(window, {}).items() if index in current}
+        bucket = buckets.setdefault(str(_bucket_index(window, now)), [0, 0])
+        bucket[0] += _cents(amount)
+        bucket[1] += count
+        usage.buckets[window] = buckets
+
+    if usage._state.adding:
+        usage.save(force_insert=True)
+    else:
+        usage.save(update_fields=['buckets'])
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from authentication.models import UserBankAccount
+from utils.timeranges import local_date
+from transactions.models import Transaction, DailyAccountSummary
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily account summaries from the transaction history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200,
+                            help='Number of accounts rebuilt per database transaction')
+        parser.add_argument('--account', type=int, action='append', dest='accounts',
+                            help='Only rebuild this account id (can be repeated)')
+
+    def handle(self, *args, **options):
+        accounts = UserBankAccount.objects.order_by('id').values_list('id', flat=True)
+        if options['accounts']:
+            accounts = accounts.filter(id__in=options['accounts'])
+
+        last_id = 0
+        rebuilt = 0
+        while True:
+            chunk = list(accounts.filter(id__gt=last_id)[:options['chunk_size']])
+            if not chunk:
+                break
+
+            with transaction.atomic():
+                # Same lock order as the balance service, so writers wait instead of slipping in
+                list(UserBankAccount.objects.select_for_update().filter(id__in=chunk).order_by('id')
+                     .values_list('id', flat=True))
+                DailyAccountSummary.objects.filter(account_id__in=chunk).delete()
+                DailyAccountSummary.objects.bulk_create(self.summaries(chunk), batch_size=1000)
+
+            last_id = chunk[-1]
+            rebuilt += len(chunk)
+            self.stdout.write(f'Rebuilt {rebuilt} accounts')
+
+        self.stdout.write(self.style.SUCCESS(f'Done, {rebuilt} accounts rebuilt'))
+
+    def summaries(self, account_ids):
+        rows = Transaction.objects.filter(account_id__in=account_ids).order_by('account_id', 'timestamp', 'id') \
+            .values_list('account_id', 'timestamp', 'transaction_type', 'amount', 'balance_after_transaction') \
+            .iterator(chunk_size=2000)
+
+        current = None
+        day = {}
+        closing_balance = None
+        for account_id, timestamp, transaction_type, amount, balance in rows:
+            key = (account_id, local_date(timestamp))
+            if key != current:
+                yield from self.flush(current, day, closing_balance)
+                current = key
+                day = {}
+
+            count, total = day.get(transaction_type, (0, 0))
+            day[transaction_type] = (count + 1, total + amount)
+            closing_balance = balance
+
+        yield from self.flush(current, day, closing_balance)
+
+    def flush(self, key, day, closing_balance):
+        if key is None:
+            return
+
+        account_id, date = key
+        for transaction_type, (count, total) in day.items():
+            yield DailyAccountSummary(
+                account_id=account_id, date=date, transaction_type=transaction_type,
+                count=count, total=total, closing_balance=closing_balance)
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.4 on 2026-10-18 19:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_auto_20210114_1446'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', '-timestamp'], name='transaction_account_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.1.4 on 2026-10-18 20:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0006_bankaccounttype_limits'),
+        ('transactions', '0005_dailyaccountsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountDebitUsage',
+            fields=[
+                ('account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='debit_usage', serialize=False, to='authentication.userbankaccount')),
+                ('buckets', models.JSONField(default=dict)),
+            ],
+        ),
+    ]
@@ -28,6 +28,9 @@ class Transaction(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['account', '-timestamp'], name='transaction_account_ts_idx'),
+        ]
 
 
 class MoneyTransfer(models.Model):
@@ -38,3 +41,51 @@ class MoneyTransfer(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+
+
+class DailyAccountSummary(models.Model):
+    account = models.ForeignKey(
+        to=UserBankAccount,
+        related_name='daily_summaries',
+        on_delete=models.CASCADE,
+    )
+    date = models.DateField()
+    transaction_type = models.PositiveSmallIntegerField(
+        choices=TRANSACTION_TYPE_CHOICES
+    )
+    count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(
+        default=0,
+        decimal_places=2,
+        max_digits=14
+    )
+    closing_balance = models.DecimalField(
+        decimal_places=2,
+        max_digits=12
+    )
+
+    def __str__(self):
+        return f'{self.account_id} - {self.date} - {self.transaction_type} - {self.count} x R$ {self.total}'
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'date', 'transaction_type'], name='daily_summary_unique'),
+        ]
+
+
+class AccountDebitUsage(models.Model):
+    """
+    Sliding-window debit counters behind the hourly/daily limits, one row per
+    account: ``{window: {bucket index: [amount in cents, count]}}``.
+    """
+    account = models.OneToOneField(
+        to=UserBankAccount,
+        related_name='debit_usage',
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    buckets = models.JSONField(default=dict)
+
+    def __str__(self):
+        return f'{self.account_id} - {self.buckets}'
@@ -0,0 +1,56 @@
+"""
+Per-account response cache for the transaction report endpoints.
+
+Pages are cached under the account id, a revision of the account's ledger
+given by the view and the request URL. A new transaction changes the
+revision, which orphans every cached page of the account at once without
+scanning keys or any write on commit; the orphans just expire.
+"""
+import hashlib
+import threading
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+from utils.timeranges import local_date
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def stats():
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': round(hits / total, 4) if total else None}
+
+
+def _count(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+class CachedReportMixin:
+    """Serves ``list()`` from the per-account report cache, adding an ``X-Cache: HIT/MISS`` header."""
+
+    def get_cache_revision(self, account_id):
+        """The state of the account the cached pages belong to, changed by every new transaction."""
+        raise NotImplementedError('Views using CachedReportMixin must define get_cache_revision()')
+
+    def list(self, request, *args, **kwargs):
+        account_id = request.user.account.id
+        url = hashlib.sha256(request.build_absolute_uri().encode()).hexdigest()
+        # Today's date is part of the key: "today" and "last N days" move at midnight without any write
+        key = f'report:{account_id}:{self.get_cache_revision(account_id)}:{local_date()}:{url}'
+
+        data = cache.get(key)
+        if data is not None:
+            _count('hits')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _count('misses')
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, settings.REPORT_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,76 @@
+"""
+Incremental maintenance of ``DailyAccountSummary``.
+
+``record`` is called by ``services`` inside the same atomic block that moves
+the balance, so the rollup can never disagree with the ledger. Reports then
+read at most one row per day and transaction type instead of every transaction.
+"""
+from collections import defaultdict
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from utils.timeranges import local_date
+from .models import DailyAccountSummary
+
+
+def record(account_id, transaction_type, amount, closing_balance, timestamp=None, count=1):
+    date = local_date(timestamp)
+    day = DailyAccountSummary.objects.filter(account_id=account_id, date=date)
+
+    if not _increment(day, transaction_type, amount, closing_balance, count):
+        try:
+            with transaction.atomic():
+                DailyAccountSummary.objects.create(
+                    account_id=account_id, date=date, transaction_type=transaction_type,
+                    count=count, total=amount, closing_balance=closing_balance)
+        except IntegrityError:
+            # Someone else created the row between our update and insert
+            _increment(day, transaction_type, amount, closing_balance, count)
+
+    # The closing balance belongs to the day, keep every type row of it in step
+    day.exclude(transaction_type=transaction_type).update(closing_balance=closing_balance)
+
+
+def record_transaction(transaction_instance):
+    record(transaction_instance.account_id, transaction_instance.transaction_type, transaction_instance.amount,
+           transaction_instance.balance_after_transaction, transaction_instance.timestamp)
+
+
+def _increment(day, transaction_type, amount, closing_balance, count):
+    return day.filter(transaction_type=transaction_type).update(
+        count=F('count') + count, total=F('total') + amount, closing_balance=closing_balance)
+
+
+def record_many(entries):
+    """
+    Applies many ``(account_id, transaction_type, amount, closing_balance, count)``
+    entries for today in three queries, whatever their number.
+
+    The accounts must be locked by the caller: the rows are read, changed in
+    memory and written back with ``bulk_update``.
+    """
+    date = local_date()
+    entries = list(entries)
+    rows = DailyAccountSummary.objects.filter(
+        account_id__in={entry[0] for entry in entries}, date=date)
+
+    days = defaultdict(dict)
+    for row in rows:
+        days[row.account_id][row.transaction_type] = row
+
+    created = []
+    for account_id, transaction_type, amount, closing_balance, count in entries:
+        day = days[account_id]
+        if transaction_type not in day:
+            day[transaction_type] = DailyAccountSummary(
+                account_id=account_id, date=date, transaction_type=transaction_type, count=0, total=0)
+            created.append(day[transaction_type])
+
+        day[transaction_type].count += count
+        day[transaction_type].total += amount
+        for row in day.values():
+            row.closing_balance = closing_balance
+
+    DailyAccountSummary.objects.bulk_update(
+        [row for day in days.values() for row in day.values() if row.pk is not None],
+        ['count', 'total', 'closing_balance'])
+    DailyAccountSummary.objects.bulk_create(created)
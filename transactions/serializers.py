@@ -1,9 +1,9 @@
 from rest_framework import serializers
 from rest_framework.exceptions import NotAcceptable
 from django.conf import settings
-from .models import Transaction, MoneyTransfer
-from authentication.models import UserBankAccount
-from .constants import DEPOSIT, WITHDRAWAL, TRANSFER_MONEY, TRANSFER_MONEY_RECEIVED
+from .models import Transaction, MoneyTransfer, DailyAccountSummary
+from .constants import DEPOSIT, WITHDRAWAL, TRANSFER_MONEY
+from . import services
 
 
 class TransactionSerializer(serializers.ModelSerializer):
@@ -14,6 +14,13 @@ class TransactionSerializer(serializers.ModelSerializer):
                   'sender_user_name']
 
 
+class DailyAccountSummarySerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = DailyAccountSummary
+        fields = ['date', 'transaction_type', 'count', 'total', 'closing_balance']
+
+
 class TransferSerializer(serializers.ModelSerializer):
     user_name = serializers.CharField(required=True)
 
@@ -26,12 +33,7 @@ class TransferSerializer(serializers.ModelSerializer):
         destination_account_number = attrs.get('destination_account_number', '')
         user_name = attrs.get('user_name', '')
 
-        # TODO check if my limit is ok, not implemented yet
-
-        current_balance = self.context['current_balance']
         current_username = self.context['current_username']
-        balance_after_transaction = self.context['balance_after_transaction']
-        current_id = self.context['current_id']
         current_account_number = self.context['current_account_number']
 
         if user_name != current_username:
@@ -40,60 +42,58 @@ class TransferSerializer(serializers.ModelSerializer):
         if current_account_number == destination_account_number:
             raise NotAcceptable(f"Please check destination account number: {destination_account_number}")
 
-        if amount_to_be_transferred > current_balance:
-            raise NotAcceptable(
-                f"You don't have enough money, your current balance is R$ {current_balance}")
-
-        qs = UserBankAccount.objects.filter(account_no=destination_account_number)
-        if not qs.exists():
-            raise NotAcceptable(f"Wrong destination account number: {destination_account_number}")
+        if amount_to_be_transferred <= 0:
+            raise NotAcceptable("You need to transfer a positive amount")
 
         return {
             'amount_to_be_transferred': amount_to_be_transferred,
             'destination_account_number': destination_account_number,
             'user_name': user_name,
-            'balance_after_transaction': balance_after_transaction,
-            'current_id': current_id,
             'transaction_type': TRANSFER_MONEY
         }
 
     def create(self, validated_data):
-        new_balance = validated_data['balance_after_transaction']
-        current_account_instance = UserBankAccount.objects.get(id=validated_data['current_id'])
+        transaction = services.transfer(
+            self.context['current_id'],
+            validated_data['destination_account_number'],
+            validated_data['amount_to_be_transferred'],
+            validated_data['user_name'])
 
-        destination_account_instance = UserBankAccount.objects.get(
-            account_no=validated_data['destination_account_number'])
+        validated_data['balance_after_transaction'] = transaction.balance_after_transaction
+        return validated_data
 
-        destination_user_balance = destination_account_instance.user.balance
-        destination_user_balance += validated_data['amount_to_be_transferred']
 
-        transaction_current_user = Transaction.objects.create(
-            account=current_account_instance, amount=validated_data['amount_to_be_transferred'],
-            balance_after_transaction=validated_data['balance_after_transaction'],
-            transaction_type=TRANSFER_MONEY, sender_user_name=destination_account_instance.user.username)
+class BatchTransferItemSerializer(serializers.Serializer):
+    destination_account_number = serializers.IntegerField()
+    amount = serializers.IntegerField()
 
-        transaction_destination_user = Transaction.objects.create(
-            account=destination_account_instance, amount=validated_data['amount_to_be_transferred'],
-            balance_after_transaction=validated_data['balance_after_transaction'],
-            transaction_type=TRANSFER_MONEY_RECEIVED, sender_user_name=current_account_instance.user.username)
 
-        money_transfer = MoneyTransfer.objects.create(
-            user_name=validated_data['user_name'],
-            destination_account_number=validated_data['destination_account_number'],
-            amount_to_be_transferred=validated_data['amount_to_be_transferred'])
+class BatchTransferSerializer(serializers.Serializer):
+    user_name = serializers.CharField(required=True)
+    transfers = BatchTransferItemSerializer(many=True, allow_empty=False)
 
-        destination_update = UserBankAccount.objects.filter(account_no=validated_data['destination_account_number'])
-        current_update = UserBankAccount.objects.filter(id=validated_data['current_id'])
+    def validate(self, attrs):
+        user_name = attrs.get('user_name', '')
+        transfers = attrs.get('transfers', [])
 
-        # Update current and destination balance
-        current_update.update(balance=new_balance)
-        destination_update.update(balance=destination_user_balance)
+        if user_name != self.context['current_username']:
+            raise NotAcceptable("Please check your user name")
 
-        validated_data.pop('current_id')
-        transaction_current_user.save()
-        transaction_destination_user.save()
-        money_transfer.save()
-        return validated_data
+        max_batch_size = settings.MAX_BATCH_TRANSFER_SIZE
+        if len(transfers) > max_batch_size:
+            raise NotAcceptable(f"You can send at most {max_batch_size} transfers at once")
+
+        return attrs
+
+    def create(self, validated_data):
+        balance_after_transaction, results = services.transfer_batch(
+            self.context['current_id'], validated_data['transfers'], validated_data['user_name'])
+
+        return {
+            'user_name': validated_data['user_name'],
+            'balance_after_transaction': balance_after_transaction,
+            'results': results,
+        }
 
 
 class DepositSerializer(serializers.ModelSerializer):
@@ -111,25 +111,13 @@ class DepositSerializer(serializers.ModelSerializer):
         if amount < min_deposit_amount:
             raise NotAcceptable(f'You need to deposit at least R$ {min_deposit_amount}')
 
-        # Grabbing the custom context data
-        balance_after_transaction = self.context['balance_after_transaction']
-        user_account_id = self.context['user_account_id']
-
         return {
-            'account': user_account_id,
             'amount': amount,
-            'balance_after_transaction': balance_after_transaction,
             'transaction_type': DEPOSIT,
         }
 
     def create(self, validated_data):
-        new_balance = validated_data['balance_after_transaction']
-        account_instance = UserBankAccount.objects.get(id=validated_data['account'])
-        validated_data.pop('account')
-        transaction = Transaction.objects.create(account=account_instance, **validated_data)
-        UserBankAccount.objects.update(balance=new_balance)
-        transaction.save()
-        return transaction
+        return services.deposit(self.context['user_account_id'], validated_data['amount'])
 
 
 class WithdrawalSerializer(serializers.ModelSerializer):
@@ -143,34 +131,14 @@ class WithdrawalSerializer(serializers.ModelSerializer):
         amount = attrs.get('amount', '')
 
         min_withdrawal_amount = settings.MINIMUM_WITHDRAWAL_AMOUNT
-        # Grabbing the custom context data
-        maximum_withdrawal = self.context['maximum_withdrawal']
-        balance_after_transaction = self.context['balance_after_transaction']
-        user_account_id = self.context['user_account_id']
-        current_balance = self.context['current_balance']
 
         if amount < min_withdrawal_amount:
             raise NotAcceptable(f'You need to withdrawal at least R$ {min_withdrawal_amount}')
 
-        if amount > maximum_withdrawal:
-            raise NotAcceptable(f'You only can withdrawal a maximum of R$ {maximum_withdrawal}')
-
-        if amount > current_balance:
-            raise NotAcceptable(
-                f"You don't have enough money, your current balance is R$ {current_balance}")
-
         return {
-            'account': user_account_id,
             'amount': amount,
-            'balance_after_transaction': balance_after_transaction,
             'transaction_type': WITHDRAWAL,
         }
 
     def create(self, validated_data):
-        new_balance = validated_data['balance_after_transaction']
-        account_instance = UserBankAccount.objects.get(id=validated_data['account'])
-        validated_data.pop('account')
-        transaction = Transaction.objects.create(account=account_instance, **validated_data)
-        UserBankAccount.objects.update(balance=new_balance)
-        transaction.save()
-        return transaction
+        return services.withdraw(self.context['user_account_id'], validated_data['amount'])
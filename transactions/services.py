@@ -0,0 +1,209 @@
+"""
+Balance mutations shared by the deposit, withdrawal and transfer endpoints.
+
+Every operation runs inside a single ``atomic()`` block. The accounts involved
+are locked with ``select_for_update`` in ascending id order, so two opposite
+transfers can never deadlock, and balances are moved with ``F()`` expressions.
+Debits are additionally guarded with ``balance__gte`` so an account can't go
+below zero even on backends that ignore row locks. Hourly/daily limits are
+checked while the debited account is locked, and the daily rollup is updated
+in the same block.
+"""
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Value, When
+from rest_framework.exceptions import NotAcceptable
+from authentication import principals
+from authentication.models import UserBankAccount
+from .models import Transaction, MoneyTransfer
+from .constants import DEPOSIT, WITHDRAWAL, TRANSFER_MONEY, TRANSFER_MONEY_RECEIVED
+from . import limits, rollups
+
+
+def _locked_accounts(lookup):
+    return list(
+        UserBankAccount.objects.select_for_update(of=('self',))
+        .select_related('user', 'account_type')
+        .filter(lookup)
+        .order_by('id'))
+
+
+def _credit(account, amount):
+    UserBankAccount.objects.filter(id=account.id).update(balance=F('balance') + amount)
+    account.balance += amount
+
+
+def _debit(account, amount):
+    if amount > account.balance:
+        raise NotAcceptable(f"You don't have enough money, your current balance is R$ {account.balance}")
+
+    updated = UserBankAccount.objects.filter(
+        id=account.id, balance__gte=amount).update(balance=F('balance') - amount)
+    if not updated:
+        raise NotAcceptable(f"You don't have enough money, your current balance is R$ {account.balance}")
+    account.balance -= amount
+
+
+def deposit(account_id, amount):
+    """Credits ``amount`` to the account and returns the new ``Transaction``."""
+    with transaction.atomic():
+        account, = _locked_accounts(Q(id=account_id))
+        _credit(account, amount)
+
+        created = Transaction.objects.create(
+            account=account, amount=amount, balance_after_transaction=account.balance,
+            transaction_type=DEPOSIT)
+        rollups.record_transaction(created)
+        principals.invalidate_on_commit(account.user_id)
+
+        return created
+
+
+def withdraw(account_id, amount):
+    """Debits ``amount`` from the account and returns the new ``Transaction``."""
+    with transaction.atomic():
+        account, = _locked_accounts(Q(id=account_id))
+
+        maximum_withdrawal = account.account_type.maximum_withdrawal_amount
+        if amount > maximum_withdrawal:
+            raise NotAcceptable(f'You only can withdrawal a maximum of R$ {maximum_withdrawal}')
+
+        limits.check(account, amount)
+        _debit(account, amount)
+        limits.record(account, amount)
+
+        created = Transaction.objects.create(
+            account=account, amount=amount, balance_after_transaction=account.balance,
+            transaction_type=WITHDRAWAL)
+        rollups.record_transaction(created)
+        principals.invalidate_on_commit(account.user_id)
+
+        return created
+
+
+def transfer(account_id, destination_account_number, amount, user_name):
+    """
+    Moves ``amount`` from the account to the one identified by
+    ``destination_account_number``.
+
+    Returns the sender's ``Transaction``; its ``balance_after_transaction`` is
+    the sender's new balance.
+    """
+    with transaction.atomic():
+        accounts = _locked_accounts(Q(id=account_id) | Q(account_no=destination_account_number))
+
+        source = next((account for account in accounts if account.id == account_id), None)
+        destination = next(
+            (account for account in accounts if account.account_no == destination_account_number), None)
+
+        if destination is None:
+            raise NotAcceptable(f"Wrong destination account number: {destination_account_number}")
+        if destination is source:
+            raise NotAcceptable(f"Please check destination account number: {destination_account_number}")
+
+        limits.check(source, amount)
+
+        # Balances are written in the same id order the rows were locked in
+        for account in accounts:
+            if account is source:
+                _debit(source, amount)
+            else:
+                _credit(destination, amount)
+        limits.record(source, amount)
+
+        sent, received = Transaction.objects.bulk_create([
+            Transaction(account=source, amount=amount, balance_after_transaction=source.balance,
+                        transaction_type=TRANSFER_MONEY, sender_user_name=destination.user.username),
+            Transaction(account=destination, amount=amount, balance_after_transaction=destination.balance,
+                        transaction_type=TRANSFER_MONEY_RECEIVED, sender_user_name=source.user.username),
+        ])
+        rollups.record_transaction(sent)
+        rollups.record_transaction(received)
+        principals.invalidate_on_commit(source.user_id, destination.user_id)
+
+        MoneyTransfer.objects.create(
+            user_name=user_name,
+            destination_account_number=destination_account_number,
+            amount_to_be_transferred=amount)
+
+        return sent
+
+
+def transfer_batch(account_id, transfers, user_name):
+    """
+    Moves money from the account to many destinations at once.
+
+    ``transfers`` is a list of ``{'destination_account_number', 'amount'}``.
+    Destinations are resolved and locked with a single ``IN`` query, invalid
+    items are rejected individually, and the accepted total is checked against
+    the balance once. Returns ``(sender's new balance, per-item results)``.
+    """
+    with transaction.atomic():
+        numbers = {item['destination_account_number'] for item in transfers}
+        accounts = _locked_accounts(Q(id=account_id) | Q(account_no__in=numbers))
+
+        source = next(account for account in accounts if account.id == account_id)
+        destinations = {account.account_no: account for account in accounts}
+
+        results = []
+        accepted = []
+        for item in transfers:
+            number, amount = item['destination_account_number'], item['amount']
+            destination = destinations.get(number)
+
+            if amount <= 0:
+                detail = "You need to transfer a positive amount"
+            elif destination is None:
+                detail = f"Wrong destination account number: {number}"
+            elif destination is source:
+                detail = f"Please check destination account number: {number}"
+            else:
+                detail = None
+                accepted.append((destination, amount))
+
+            results.append({'destination_account_number': number, 'amount': amount,
+                            'status': 'rejected' if detail else 'transferred', 'detail': detail})
+
+        if not accepted:
+            return source.balance, results
+
+        total = sum(amount for _, amount in accepted)
+        limits.check(source, total, count=len(accepted))
+        _debit(source, total)
+        limits.record(source, total, count=len(accepted))
+
+        credits = defaultdict(int)
+        for destination, amount in accepted:
+            credits[destination.id] += amount
+        UserBankAccount.objects.filter(id__in=credits).update(balance=F('balance') + Case(
+            *[When(id=pk, then=Value(amount)) for pk, amount in credits.items()],
+            output_field=DecimalField(max_digits=12, decimal_places=2)))
+
+        # Replay the items in order so every row carries the balance it left behind
+        balance = source.balance + total
+        rows = []
+        for destination, amount in accepted:
+            balance -= amount
+            destination.balance += amount
+            rows.append(Transaction(account=source, amount=amount, balance_after_transaction=balance,
+                                    transaction_type=TRANSFER_MONEY, sender_user_name=destination.user.username))
+            rows.append(Transaction(account=destination, amount=amount, balance_after_transaction=destination.balance,
+                                    transaction_type=TRANSFER_MONEY_RECEIVED, sender_user_name=source.user.username))
+        Transaction.objects.bulk_create(rows)
+
+        received = defaultdict(lambda: [0, 0])
+        for destination, amount in accepted:
+            received[destination][0] += amount
+            received[destination][1] += 1
+        rollups.record_many(
+            [(source.id, TRANSFER_MONEY, total, source.balance, len(accepted))]
+            + [(destination.id, TRANSFER_MONEY_RECEIVED, amount, destination.balance, count)
+               for destination, (amount, count) in received.items()])
+        principals.invalidate_on_commit(source.user_id, *{destination.user_id for destination, _ in accepted})
+
+        MoneyTransfer.objects.bulk_create([
+            MoneyTransfer(user_name=user_name, destination_account_number=destination.account_no,
+                          amount_to_be_transferred=amount)
+            for destination, amount in accepted])
+
+        return source.balance, results
@@ -1,3 +1,482 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import time
+import warnings
+from decimal import Decimal
+from unittest import mock
+from django.core.management import call_command
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework.exceptions import NotAcceptable
+from authentication.models import User, BankAccountType, UserBankAccount
+from .models import Transaction, MoneyTransfer, DailyAccountSummary, AccountDebitUsage
+from .constants import DEPOSIT, WITHDRAWAL, TRANSFER_MONEY, TRANSFER_MONEY_RECEIVED
+from . import services
+from utils.timeranges import days_range
 
-# Create your tests here.
+
+class TransactionTestMixin:
+    account_type_limits = {}
+
+    def setUp(self):
+        cache.clear()
+        self.account_type = BankAccountType.objects.create(
+            name='Basic', maximum_withdrawal_amount=500, **self.account_type_limits)
+        self.account = self.create_account('alice', 1000)
+        self.other_account = self.create_account('bob', 100)
+
+        return super().setUp()
+
+    def create_account(self, username, balance):
+        user = User.objects.create_user(username, f'{username}@example.com', 'password123')
+        return UserBankAccount.objects.create(
+            user=user, account_type=self.account_type, account_no=user.id + 100, gender='F', balance=balance)
+
+    def balance_of(self, account):
+        account.refresh_from_db(fields=['balance'])
+        return account.balance
+
+
+class TransactionTestSetUp(TransactionTestMixin, APITestCase):
+    pass
+
+
+class TestServices(TransactionTestSetUp):
+
+    def test_deposit_credits_only_the_given_account(self):
+        transaction = services.deposit(self.account.id, Decimal('50.25'))
+
+        self.assertEqual(transaction.balance_after_transaction, Decimal('1050.25'))
+        self.assertEqual(self.balance_of(self.account), Decimal('1050.25'))
+        self.assertEqual(self.balance_of(self.other_account), Decimal('100'))
+
+    def test_withdrawal_above_balance_is_rejected(self):
+        with self.assertRaises(NotAcceptable):
+            services.withdraw(self.other_account.id, 200)
+
+        self.assertEqual(self.balance_of(self.other_account), Decimal('100'))
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_withdrawal_above_account_type_maximum_is_rejected(self):
+        with self.assertRaises(NotAcceptable):
+            services.withdraw(self.account.id, 600)
+
+    def test_transfer_moves_money_and_records_both_sides(self):
+        sent = services.transfer(self.account.id, self.other_account.account_no, 300, 'alice')
+
+        self.assertEqual(sent.balance_after_transaction, Decimal('700'))
+        self.assertEqual(self.balance_of(self.account), Decimal('700'))
+        self.assertEqual(self.balance_of(self.other_account), Decimal('400'))
+
+        received = Transaction.objects.get(transaction_type=TRANSFER_MONEY_RECEIVED)
+        self.assertEqual(received.account_id, self.other_account.id)
+        self.assertEqual(received.balance_after_transaction, Decimal('400'))
+        self.assertEqual(received.sender_user_name, 'alice')
+        self.assertEqual(Transaction.objects.get(transaction_type=TRANSFER_MONEY).sender_user_name, 'bob')
+        self.assertEqual(MoneyTransfer.objects.count(), 1)
+
+    def test_transfer_to_unknown_account_is_rejected(self):
+        with self.assertRaises(NotAcceptable):
+            services.transfer(self.account.id, 999999, 10, 'alice')
+
+        self.assertEqual(self.balance_of(self.account), Decimal('1000'))
+
+    def test_transfer_query_budget(self):
+        # Today's rollup rows exist after the first transfer, later ones only update them
+        services.transfer(self.account.id, self.other_account.account_no, 10, 'alice')
+
+        # savepoint + lock + debit + credit + bulk insert + 2 rollup updates per side + money transfer
+        # + limits usage row delete + release
+        with self.assertNumQueries(12):
+            services.transfer(self.account.id, self.other_account.account_no, 10, 'alice')
+
+
+class TestReportPagination(TransactionTestSetUp):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.account.user)
+        for amount in range(1, 26):
+            services.deposit(self.account.id, amount)
+
+    def test_cursor_pages_walk_forward_and_back_without_overlap(self):
+        first = self.client.get('/transactions/report/5/').data
+        self.assertNotIn('count', first)
+        self.assertIsNone(first['previous'])
+
+        second = self.client.get(first['next']).data
+        third = self.client.get(second['next']).data
+        self.assertIsNone(third['next'])
+
+        ids = [row['id'] for page in (first, second, third) for row in page['results']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(set(ids)), 25)
+
+        back = self.client.get(third['previous']).data
+        self.assertEqual(back['results'], second['results'])
+
+    def test_page_number_mode_is_opt_in(self):
+        response = self.client.get('/transactions/report/5/', {'page': 2})
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get('/transactions/report/5/', {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+
+class TestReportRanges(TransactionTestSetUp):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.account.user)
+        self.today = services.deposit(self.account.id, 10)
+        self.last_month = services.deposit(self.account.id, 20)
+        Transaction.objects.filter(id=self.last_month.id).update(
+            timestamp=self.today.timestamp - datetime.timedelta(days=31))
+
+    def test_today_report_excludes_same_day_of_other_months(self):
+        response = self.client.get('/transactions/report/today/')
+        self.assertEqual([row['id'] for row in response.data['results']], [self.today.id])
+
+    def test_days_ago_report_is_bounded_by_local_midnight(self):
+        response = self.client.get('/transactions/report/31/')
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_out_of_range_days_are_rejected(self):
+        for url in ('/transactions/report/summary/1000000/', '/transactions/report/1000000/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 400)
+
+    def test_report_uses_account_timestamp_index(self):
+        start, end = days_range(7)
+        plan = Transaction.objects.filter(
+            account=self.account, timestamp__gte=start, timestamp__lt=end).explain()
+        self.assertIn('transaction_account_ts_idx', plan)
+
+
+class TestStatementExport(TransactionTestSetUp):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.account.user)
+        services.deposit(self.account.id, 50)
+        services.withdraw(self.account.id, 20)
+
+    def test_csv_statement_streams_every_row(self):
+        response = self.client.get('/transactions/statement/csv/')
+
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="statement-', response['Content-Disposition'])
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,timestamp,transaction_type,amount,balance_after_transaction,sender_user_name')
+        self.assertEqual(len(lines), 3)
+
+    def test_ndjson_statement_filters_by_type(self):
+        response = self.client.get('/transactions/statement/ndjson/', {'transaction_type': '2'})
+
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['amount'] for row in rows], ['20.00'])
+
+    def test_invalid_filters_are_rejected(self):
+        self.assertEqual(self.client.get('/transactions/statement/csv/', {'start_date': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get('/transactions/statement/xml/').status_code, 404)
+
+
+class TestDailySummaries(TransactionTestSetUp):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.account.user)
+        services.deposit(self.account.id, 50)
+        services.deposit(self.account.id, 25)
+        services.withdraw(self.account.id, 100)
+        services.transfer(self.account.id, self.other_account.account_no, 75, 'alice')
+
+    def summaries(self):
+        return list(DailyAccountSummary.objects.order_by('account_id', 'transaction_type').values_list(
+            'account_id', 'transaction_type', 'count', 'total', 'closing_balance'))
+
+    def test_balance_service_keeps_rollup_in_step(self):
+        self.assertEqual(self.summaries(), [
+            (self.account.id, DEPOSIT, 2, Decimal('75'), Decimal('900')),
+            (self.account.id, WITHDRAWAL, 1, Decimal('100'), Decimal('900')),
+            (self.account.id, TRANSFER_MONEY, 1, Decimal('75'), Decimal('900')),
+            (self.other_account.id, TRANSFER_MONEY_RECEIVED, 1, Decimal('75'), Decimal('175')),
+        ])
+
+    def test_rebuild_command_matches_incremental_rollup(self):
+        expected = self.summaries()
+        DailyAccountSummary.objects.all().delete()
+
+        call_command('rebuild_daily_summaries', chunk_size=1, stdout=io.StringIO())
+
+        self.assertEqual(self.summaries(), expected)
+
+    def test_summary_endpoint_reads_the_rollup(self):
+        # Totals by type + daily rows
+        with self.assertNumQueries(2):
+            response = self.client.get('/transactions/report/summary/7/')
+
+        self.assertEqual(response.data['totals'][0], {'transaction_type': DEPOSIT, 'count': 2, 'total': Decimal('75')})
+        self.assertEqual(len(response.data['daily']), 3)
+
+
+class TestLimits(TransactionTestMixin, APITransactionTestCase):
+    account_type_limits = {'hourly_count_limit': 2, 'daily_amount_limit': 150}
+
+    def test_count_limit_applies_to_withdrawals_and_transfers_together(self):
+        services.withdraw(self.account.id, 10)
+        services.transfer(self.account.id, self.other_account.account_no, 10, 'alice')
+
+        with self.assertRaisesMessage(NotAcceptable, 'hourly limit of 2 operations'):
+            services.withdraw(self.account.id, 10)
+
+    def test_amount_limit_is_cumulative(self):
+        services.withdraw(self.account.id, 100)
+
+        with self.assertRaisesMessage(NotAcceptable, 'you can still move R$ 50.00'):
+            services.transfer(self.account.id, self.other_account.account_no, 60, 'alice')
+        self.assertEqual(self.balance_of(self.account), Decimal('900'))
+
+    def test_missing_usage_row_falls_back_to_the_ledger(self):
+        services.withdraw(self.account.id, 100)
+        AccountDebitUsage.objects.all().delete()
+
+        with self.assertRaises(NotAcceptable):
+            services.withdraw(self.account.id, 60)
+
+    def test_counters_roll_back_with_the_debit(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            services.withdraw(self.account.id, 100)
+            raise RuntimeError()
+
+        # Would be over the daily R$ 150 had the rolled back withdrawal been counted
+        services.withdraw(self.account.id, 100)
+
+    def test_limits_outlive_the_last_debit(self):
+        services.withdraw(self.account.id, 100)
+
+        with mock.patch('transactions.limits.time.time', return_value=time.time() + 6 * 60), \
+                self.assertRaises(NotAcceptable):
+            services.withdraw(self.account.id, 100)
+
+    def test_debit_reads_and_writes_the_counters_once(self):
+        services.withdraw(self.account.id, 10)
+
+        with CaptureQueriesContext(connection) as queries:
+            services.withdraw(self.account.id, 10)
+
+        # One read and one write of the usage row, no SUM over the ledger
+        self.assertFalse([query for query in queries
+                          if query['sql'].startswith('SELECT') and 'FROM "transactions_transaction"' in query['sql']])
+        usage = [query['sql'].split()[0] for query in queries if '"transactions_accountdebitusage"' in query['sql']]
+        self.assertEqual(usage, ['SELECT', 'UPDATE'])
+
+
+class TestIdempotency(TransactionTestSetUp):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.account.user)
+
+    def withdraw(self, amount, key='retry-1'):
+        return self.client.post('/transactions/withdrawal/', {'amount': amount}, format='json',
+                                HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_stored_response_without_touching_the_ledger(self):
+        first = self.withdraw(20)
+        retry = self.withdraw(20)
+
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.assertEqual(self.balance_of(self.account), Decimal('980'))
+
+    def test_key_reused_with_other_body_is_rejected(self):
+        self.withdraw(20)
+        self.assertEqual(self.withdraw(30).status_code, 422)
+
+    def test_failed_request_does_not_burn_the_key(self):
+        self.assertEqual(self.withdraw(5000).status_code, 406)
+        self.assertEqual(self.withdraw(20).status_code, 201)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    @override_settings(IDEMPOTENCY_WAIT_TIMEOUT=0.1)
+    def test_request_waits_for_in_flight_key_then_conflicts(self):
+        with mock.patch('utils.idempotency.cache.add', return_value=False), \
+                mock.patch('utils.idempotency.cache.get', return_value=None):
+            response = self.withdraw(20)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Transaction.objects.exists())
+
+
+class TestBatchTransfer(TransactionTestSetUp):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.account.user)
+        self.third_account = self.create_account('carol', 0)
+
+    def batch(self, transfers):
+        return self.client.post('/transactions/transfer/batch/', {'user_name': 'alice', 'transfers': transfers},
+                                format='json')
+
+    def test_batch_reports_each_item_and_moves_the_accepted_total(self):
+        response = self.batch([
+            {'destination_account_number': self.other_account.account_no, 'amount': 100},
+            {'destination_account_number': 999999, 'amount': 50},
+            {'destination_account_number': self.third_account.account_no, 'amount': 30},
+            {'destination_account_number': self.other_account.account_no, 'amount': 20},
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['total_transferred'], 150)
+        self.assertEqual([item['status'] for item in response.data['results']],
+                         ['transferred', 'rejected', 'transferred', 'transferred'])
+        self.assertEqual(self.balance_of(self.account), Decimal('850'))
+        self.assertEqual(self.balance_of(self.other_account), Decimal('220'))
+        self.assertEqual(self.balance_of(self.third_account), Decimal('30'))
+        self.assertEqual(MoneyTransfer.objects.count(), 3)
+        self.assertEqual(
+            list(Transaction.objects.filter(account=self.other_account).order_by('id')
+                 .values_list('balance_after_transaction', flat=True)), [Decimal('200'), Decimal('220')])
+
+    def test_total_above_balance_rejects_the_whole_batch(self):
+        response = self.batch([{'destination_account_number': self.other_account.account_no, 'amount': 600},
+                               {'destination_account_number': self.third_account.account_no, 'amount': 600}])
+
+        self.assertEqual(response.status_code, 406)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        def run(count):
+            transfers = [{'destination_account_number': account.account_no, 'amount': 1}
+                         for account in [self.other_account, self.third_account] * count]
+            with CaptureQueriesContext(connection) as queries:
+                services.transfer_batch(self.account.id, transfers, 'alice')
+            return len(queries)
+
+        run(1)
+        # Kept under SQLite's 999 parameters so bulk_create stays a single INSERT
+        self.assertEqual(run(2), run(20))
+
+
+class TestEnvelopeRender(TransactionTestSetUp):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.account.user)
+
+    def test_success_is_wrapped_in_data_with_decimals_encoded(self):
+        response = self.client.post('/transactions/deposit/', {'amount': '10.50'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(json.loads(response.content)['data']['balance_after_transaction'], 1010.5)
+
+    def test_errors_are_detected_from_the_response_not_the_payload(self):
+        response = self.client.post('/transactions/deposit/', {'amount': '1'}, format='json')
+
+        self.assertEqual(response.status_code, 406)
+        self.assertIn('errors', json.loads(response.content))
+
+
+class TestReportCache(TransactionTestMixin, APITransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.account.user)
+        services.deposit(self.account.id, 10)
+
+    def test_pages_are_served_from_cache_until_the_account_changes(self):
+        first = self.client.get('/transactions/report/')
+        second = self.client.get('/transactions/report/')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+
+        services.deposit(self.account.id, 20)
+
+        third = self.client.get('/transactions/report/')
+        self.assertEqual(third['X-Cache'], 'MISS')
+        self.assertEqual(len(third.data['results']), 2)
+
+    def test_transfer_invalidates_the_receiving_account_too(self):
+        self.client.force_authenticate(self.other_account.user)
+        self.client.get('/transactions/report/today/')
+
+        services.transfer(self.account.id, self.other_account.account_no, 5, 'alice')
+
+        response = self.client.get('/transactions/report/today/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_new_transactions_change_the_etag_and_the_key(self):
+        first = self.client.get('/transactions/report/')
+
+        services.deposit(self.account.id, 20)
+
+        response = self.client.get('/transactions/report/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_query_params_are_part_of_the_key(self):
+        self.client.get('/transactions/report/')
+        self.assertEqual(self.client.get('/transactions/report/', {'page': 1})['X-Cache'], 'MISS')
+
+
+class TestConditionalGet(TransactionTestSetUp):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.account.user)
+        services.deposit(self.account.id, 10)
+
+    def test_report_answers_304_after_a_single_lookup(self):
+        first = self.client.get('/transactions/report/')
+        self.assertIn('Last-Modified', first)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/transactions/report/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+
+    def test_new_transaction_changes_the_etag(self):
+        etag = self.client.get('/transactions/report/today/')['ETag']
+        services.withdraw(self.account.id, 10)
+
+        response = self.client.get('/transactions/report/today/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_user_profile_supports_conditional_get(self):
+        etag = self.client.get('/auth/user/')['ETag']
+        self.assertEqual(self.client.get('/auth/user/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        services.deposit(self.account.id, 10)
+        self.assertEqual(self.client.get('/auth/user/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_user_profile_etag_follows_the_account(self):
+        etag = self.client.get('/auth/user/')['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/auth/user/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Not a transaction and no updated_at bump, as an edit from another worker or the admin
+        UserBankAccount.objects.filter(id=self.account.id).update(gender='M')
+
+        response = self.client.get('/auth/user/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['account']['gender'], 'M')
+
+    def test_report_cache_keys_are_valid_memcached_keys(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            self.assertEqual(self.client.get('/transactions/report/').status_code, 200)
@@ -2,9 +2,13 @@ from django.urls import path
 from .views import (TransactionReportListAPIView,
                     TransactionReportTodayListAPIView,
                     TransactionReportDaysAgoListAPIView,
+                    TransactionSummaryDaysAgoAPIView,
+                    TransactionReportCacheStatsAPIView,
                     DepositCreateAPIView,
                     WithdrawalCreateAPIView,
-                    TransferCreateAPIView)
+                    TransferCreateAPIView,
+                    BatchTransferCreateAPIView,
+                    TransactionStatementExportAPIView)
 
 app_name = 'transactions'
 
@@ -13,6 +17,10 @@ urlpatterns = [
     path("report/", TransactionReportListAPIView.as_view(), name="report"),
     path("report/today/", TransactionReportTodayListAPIView.as_view(), name="report-today"),
     path("report/<int:days>/", TransactionReportDaysAgoListAPIView.as_view(), name="report-day-ago"),
+    path("report/cache-stats/", TransactionReportCacheStatsAPIView.as_view(), name="report-cache-stats"),
+    path("report/summary/<int:days>/", TransactionSummaryDaysAgoAPIView.as_view(), name="report-summary-day-ago"),
+    path("statement/<str:file_type>/", TransactionStatementExportAPIView.as_view(), name="statement-export"),
     path("withdrawal/", WithdrawalCreateAPIView.as_view(), name="withdrawal"),
     path("transfer/", TransferCreateAPIView.as_view(), name="money-transfer"),
+    path("transfer/batch/", BatchTransferCreateAPIView.as_view(), name="money-transfer-batch"),
 ]
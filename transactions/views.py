@@ -1,73 +1,192 @@
-from decimal import Decimal
-from rest_framework import generics, status
+import datetime
+from django.db.models import Sum
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from rest_framework import generics, status, views
 from rest_framework import permissions
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
-from .models import Transaction
-from .renderers import CustomRender
+from .models import Transaction, DailyAccountSummary
+from .constants import TRANSACTION_TYPE_CHOICES
+from .exporters import EXPORTERS
+from .reportcache import CachedReportMixin
+from . import reportcache
 from .serializers import (
     TransactionSerializer,
+    DailyAccountSummarySerializer,
     DepositSerializer,
     TransferSerializer,
+    BatchTransferSerializer,
     WithdrawalSerializer)
-from django.utils import timezone
-import datetime
-from utils.custompagination import MaxSizePerPage30, MaxSizePerPage10
+from utils.conditional import make_etag, not_modified, set_validators
+from utils.idempotency import idempotent
+from utils.renderers import EnvelopeRender
+from utils.timeranges import days_ago, days_range, local_date, start_of_day
+from utils.custompagination import CursorMaxSizePerPage30, CursorMaxSizePerPage10
+
+
+class ConditionalReportMixin:
+    """
+    ETag / Last-Modified for report pages, derived from the account's latest
+    transaction with one lookup on the (account, -timestamp) index, so a
+    matching ``If-None-Match`` is answered with 304 before any page is built.
+
+    The page is cached under that same state, never under another ETag.
+    """
+
+    def list(self, request, *args, **kwargs):
+        account_id = request.user.account.id
+        latest = Transaction.objects.filter(account_id=account_id).order_by('-timestamp', '-id') \
+            .values_list('id', 'timestamp').first()
+        latest_id, last_modified = latest or (None, None)
+        etag = make_etag(account_id, latest_id, last_modified, local_date(), request.build_absolute_uri())
 
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
 
-class TransactionReportDaysAgoListAPIView(generics.ListAPIView):
+        self.report_state = (latest_id, last_modified)
+        return set_validators(super().list(request, *args, **kwargs), etag, last_modified)
+
+    def get_cache_revision(self, account_id):
+        # The same state as the ETag: a page can't be cached under a newer one
+        latest_id, last_modified = self.report_state
+        return f'{latest_id}:{last_modified.timestamp() if last_modified else None}'
+
+
+class TransactionReportDaysAgoListAPIView(ConditionalReportMixin, CachedReportMixin, generics.ListAPIView):
     serializer_class = TransactionSerializer
     queryset = Transaction.objects.all()
     permission_classes = (permissions.IsAuthenticated,)
-    pagination_class = MaxSizePerPage10
+    pagination_class = CursorMaxSizePerPage10
 
     def get_queryset(self, **kwargs):
-        today = timezone.now()
-        date_ago = today - datetime.timedelta(self.kwargs['days'])
+        start, end = days_range(self.kwargs['days'])
+
+        return self.queryset.filter(account=self.request.user.account, timestamp__gte=start, timestamp__lt=end)
+
+
+class TransactionSummaryDaysAgoAPIView(views.APIView):
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request, days):
+        today = local_date()
+        start_date = days_ago(days, today)
+
+        # At most one row per day and transaction type, whatever the account's volume
+        summaries = DailyAccountSummary.objects.filter(
+            account=request.user.account, date__gte=start_date, date__lte=today)
 
-        return self.queryset.filter(account=self.request.user.account, timestamp__gte=date_ago)
+        totals = summaries.order_by('transaction_type').values('transaction_type').annotate(
+            count=Sum('count'), total=Sum('total'))
+
+        return Response(
+            {'start_date': start_date,
+             'end_date': today,
+             'totals': list(totals),
+             'daily': DailyAccountSummarySerializer(summaries.order_by('-date', 'transaction_type'), many=True).data},
+            status=status.HTTP_200_OK)
 
 
-class TransactionReportTodayListAPIView(generics.ListAPIView):
+class TransactionReportTodayListAPIView(ConditionalReportMixin, CachedReportMixin, generics.ListAPIView):
     serializer_class = TransactionSerializer
     queryset = Transaction.objects.all()
     permission_classes = (permissions.IsAuthenticated,)
-    pagination_class = MaxSizePerPage30
+    pagination_class = CursorMaxSizePerPage30
 
     def get_queryset(self):
-        return self.queryset.filter(account=self.request.user.account, timestamp__day=timezone.now().day)
+        start, end = days_range()
+
+        return self.queryset.filter(account=self.request.user.account, timestamp__gte=start, timestamp__lt=end)
 
 
-class TransactionReportListAPIView(generics.ListAPIView):
+class TransactionReportListAPIView(ConditionalReportMixin, CachedReportMixin, generics.ListAPIView):
     serializer_class = TransactionSerializer
     queryset = Transaction.objects.all()
     permission_classes = (permissions.IsAuthenticated,)
-    pagination_class = MaxSizePerPage30
+    pagination_class = CursorMaxSizePerPage30
 
     def get_queryset(self):
-        return self.queryset.filter(account=self.request.user.account)
+        _, end = days_range()
+
+        return self.queryset.filter(account=self.request.user.account, timestamp__lt=end)
+
+
+class TransactionReportCacheStatsAPIView(views.APIView):
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        return Response(reportcache.stats(), status=status.HTTP_200_OK)
+
+
+class TransactionStatementExportAPIView(views.APIView):
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def perform_content_negotiation(self, request, force=False):
+        # The body is a file, not rendered data: don't 406 on ``Accept: text/csv``
+        return super().perform_content_negotiation(request, force=True)
+
+    def get_date_param(self, name):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+
+        try:
+            date = parse_date(value)
+        except ValueError:
+            date = None
+        if date is None:
+            raise ValidationError({name: f'Invalid date: {value}, use YYYY-MM-DD'})
+        return date
+
+    def get_transaction_types(self):
+        valid_types = {str(value) for value, _ in TRANSACTION_TYPE_CHOICES}
+        transaction_types = [
+            value for param in self.request.query_params.getlist('transaction_type') for value in param.split(',')]
+
+        for value in transaction_types:
+            if value not in valid_types:
+                raise ValidationError({'transaction_type': f'Invalid transaction type: {value}'})
+        return [int(value) for value in transaction_types]
+
+    def get(self, request, file_type):
+        if file_type not in EXPORTERS:
+            raise NotFound(f'Unknown statement format: {file_type}')
+        exporter, content_type = EXPORTERS[file_type]
+
+        account = request.user.account
+        start_date = self.get_date_param('start_date')
+        end_date = self.get_date_param('end_date') or local_date()
+        transaction_types = self.get_transaction_types()
+
+        queryset = Transaction.objects.filter(
+            account=account, timestamp__lt=start_of_day(end_date + datetime.timedelta(1)))
+        if start_date is not None:
+            queryset = queryset.filter(timestamp__gte=start_of_day(start_date))
+        if transaction_types:
+            queryset = queryset.filter(transaction_type__in=transaction_types)
+
+        filename = f"statement-{account.account_no}-{start_date or 'all'}-{end_date}.{file_type}"
+        response = StreamingHttpResponse(exporter(queryset), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
 
 
 class TransferCreateAPIView(generics.GenericAPIView):
     serializer_class = TransferSerializer
     permission_classes = (permissions.IsAuthenticated,)
-    renderer_classes = (CustomRender,)
+    renderer_classes = (EnvelopeRender,)
 
+    @idempotent
     def post(self, request):
         transfer = request.data
         serializer = self.serializer_class(data=transfer)
 
         # sending data to serializer throw context
-        balance_after_transaction = self.request.user.account.balance
-        balance_after_transaction -= Decimal(transfer['amount_to_be_transferred'])
-        serializer.context['balance_after_transaction'] = balance_after_transaction
-        current_balance = self.request.user.account.balance
-        serializer.context['current_balance'] = current_balance
-        current_username = self.request.user.username
-        serializer.context['current_username'] = current_username
-        current_id = self.request.user.account.id
-        serializer.context['current_id'] = current_id
-        current_account_number = self.request.user.account.account_no
-        serializer.context['current_account_number'] = current_account_number
+        account = self.request.user.account
+        serializer.context['current_username'] = self.request.user.username
+        serializer.context['current_id'] = account.id
+        serializer.context['current_account_number'] = account.account_no
 
         serializer.is_valid(raise_exception=True)
         transfer_data = serializer.save()
@@ -84,22 +203,51 @@ class TransferCreateAPIView(generics.GenericAPIView):
              'transaction_type': transfer_data['transaction_type']}, status=status.HTTP_201_CREATED)
 
 
+class BatchTransferCreateAPIView(generics.GenericAPIView):
+    serializer_class = BatchTransferSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+    renderer_classes = (EnvelopeRender,)
+
+    @idempotent
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+
+        # sending data to serializer throw context
+        account = self.request.user.account
+        serializer.context['current_username'] = self.request.user.username
+        serializer.context['current_id'] = account.id
+
+        serializer.is_valid(raise_exception=True)
+        batch_data = serializer.save()
+
+        transferred = [result for result in batch_data['results'] if result['status'] == 'transferred']
+        total_transferred = sum(result['amount'] for result in transferred)
+        balance_after_transaction = float(batch_data['balance_after_transaction'])
+
+        return Response(
+            {'username': batch_data['user_name'],
+             'balance_before_transaction': balance_after_transaction + total_transferred,
+             'total_transferred': total_transferred,
+             'balance_after_transaction': balance_after_transaction,
+             'transferred': len(transferred),
+             'rejected': len(batch_data['results']) - len(transferred),
+             'results': batch_data['results']},
+            status=status.HTTP_201_CREATED if transferred else status.HTTP_200_OK)
+
+
 class DepositCreateAPIView(generics.GenericAPIView):
     serializer_class = DepositSerializer
     queryset = Transaction.objects.all()
     permission_classes = (permissions.IsAuthenticated,)
-    renderer_classes = (CustomRender,)
+    renderer_classes = (EnvelopeRender,)
 
+    @idempotent
     def post(self, request):
         deposit = request.data
         serializer = self.serializer_class(data=deposit)
 
         # Adding custom data to my context serializer
-        balance_after_transaction = self.request.user.account.balance
-        balance_after_transaction += Decimal(deposit['amount'])
-        serializer.context['balance_after_transaction'] = balance_after_transaction
-        user_account_id = self.request.user.account.id
-        serializer.context['user_account_id'] = user_account_id
+        serializer.context['user_account_id'] = self.request.user.account.id
 
         serializer.is_valid(raise_exception=True)
         deposit_data = serializer.save()
@@ -117,22 +265,15 @@ class WithdrawalCreateAPIView(generics.GenericAPIView):
     serializer_class = WithdrawalSerializer
     queryset = Transaction.objects.all()
     permission_classes = (permissions.IsAuthenticated,)
-    renderer_classes = (CustomRender,)
+    renderer_classes = (EnvelopeRender,)
 
+    @idempotent
     def post(self, request):
         withdrawal = request.data
         serializer = self.serializer_class(data=withdrawal)
 
-        balance_after_transaction = self.request.user.account.balance
-        balance_after_transaction -= Decimal(withdrawal['amount'])
-        user_account_id = self.request.user.account.id
-        serializer.context['user_account_id'] = user_account_id
-        current_balance = self.request.user.account.balance
-        serializer.context['current_balance'] = current_balance
-
         # Adding custom data to my context serializer
-        serializer.context['balance_after_transaction'] = balance_after_transaction
-        serializer.context['maximum_withdrawal'] = self.request.user.account.account_type.maximum_withdrawal_amount
+        serializer.context['user_account_id'] = self.request.user.account.id
 
         serializer.is_valid(raise_exception=True)
         withdrawal_data = serializer.save()
@@ -0,0 +1,135 @@
+"""
+Grouped totals for the dashboard summaries and cash-flow series.
+
+Each summary is a single ``GROUP BY`` query computed by the database, so the
+cost stays one round trip whatever the number of rows, categories or buckets.
+"""
+import datetime
+from decimal import Decimal
+from django.conf import settings
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import Trunc
+from rest_framework.exceptions import ValidationError
+from expenses.models import Expense
+from incomes.models import Income
+from .models import DashboardSnapshot
+
+SNAPSHOT_KINDS = {Expense: 'EXPENSE', Income: 'INCOME'}
+
+
+def period(days):
+    """Returns the ``(start, end)`` dates covering the last ``days`` days, today included."""
+    today = datetime.date.today()
+    try:
+        return today - datetime.timedelta(days=days), today
+    except OverflowError:
+        raise ValidationError({'days': f'days can be at most {(today - datetime.date.min).days}'})
+
+
+def money(value):
+    # SQLite hands back sums without the column's scale, keep two places everywhere
+    return str(Decimal(value).quantize(Decimal('0.01')))
+
+
+def group(queryset, field):
+    """Returns ``{value of field: (total amount, count)}`` for the rows of ``queryset``."""
+    rows = queryset.order_by().values(field).annotate(total=Sum('amount'), count=Count('id'))
+    return {row[field]: (Decimal(row['total']), row['count']) for row in rows}
+
+
+def render(groups):
+    """Turns ``group()`` output into ``{key: {'amount', 'count', 'average'}}``, amounts as strings."""
+    return {
+        key: {'amount': money(total), 'count': count, 'average': money(total / count)}
+        for key, (total, count) in groups.items()
+    }
+
+
+def summarize(queryset, field):
+    return render(group(queryset, field))
+
+
+def summarize_period(model, owner, field, days):
+    """
+    Summary of the last ``days`` days. Served from today's snapshot when
+    ``build_dashboard_snapshots`` computed one for this window, merged with the
+    rows added since, otherwise aggregated over the whole period.
+    """
+    start, end = period(days)
+    queryset = model.objects.filter(owner=owner, date__gte=start, date__lte=end)
+
+    if days in settings.DASHBOARD_SNAPSHOT_WINDOWS:
+        snapshot = DashboardSnapshot.objects.filter(
+            owner=owner, kind=SNAPSHOT_KINDS[model], window=days, computed_on=end
+        ).values_list('watermark', 'totals').first()
+        if snapshot is not None:
+            watermark, totals = snapshot
+            groups = {key: (Decimal(total), count) for key, (total, count) in totals.items()}
+            for key, (total, count) in group(queryset.filter(id__gt=watermark), field).items():
+                stored_total, stored_count = groups.get(key, (0, 0))
+                groups[key] = (stored_total + total, stored_count + count)
+            return render(groups)
+
+    return summarize(queryset, field)
+
+
+INTERVALS = ('day', 'week', 'month')
+
+
+def _bucket_start(date, interval):
+    if interval == 'week':
+        return date - datetime.timedelta(days=date.weekday())
+    if interval == 'month':
+        return date.replace(day=1)
+    return date
+
+
+def _next_bucket(date, interval):
+    if interval == 'week':
+        return date + datetime.timedelta(weeks=1)
+    if interval == 'month':
+        return (date.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return date + datetime.timedelta(days=1)
+
+
+def bucket_count(interval, days):
+    """Number of entries ``cash_flow_series`` returns, without building them."""
+    start, end = period(days)
+    if interval == 'month':
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    return (_bucket_start(end, interval) - _bucket_start(start, interval)).days // (7 if interval == 'week' else 1) + 1
+
+
+def bucket_totals(queryset, interval):
+    """Returns ``{bucket start: total amount}``, truncated and summed by the database."""
+    rows = queryset.order_by().annotate(bucket=Trunc('date', interval, output_field=DateField())) \
+        .values('bucket').annotate(total=Sum('amount')).values_list('bucket', 'total')
+    return dict(rows)
+
+
+def cash_flow_series(owner, interval, days):
+    """
+    Income, expense and net per ``interval`` over the last ``days`` days, one
+    entry per bucket even when nothing happened in it, plus the running net.
+    """
+    start, end = period(days)
+    incomes = bucket_totals(Income.objects.filter(owner=owner, date__gte=start, date__lte=end), interval)
+    expenses = bucket_totals(Expense.objects.filter(owner=owner, date__gte=start, date__lte=end), interval)
+
+    series = []
+    running_net = Decimal(0)
+    bucket = _bucket_start(start, interval)
+    while bucket <= end:
+        income = Decimal(incomes.get(bucket) or 0)
+        expense = Decimal(expenses.get(bucket) or 0)
+        running_net += income - expense
+        series.append({
+            'period': bucket.isoformat(),
+            'income': money(income),
+            'expense': money(expense),
+            'net': money(income - expense),
+            'running_net': money(running_net),
+        })
+        bucket = _next_bucket(bucket, interval)
+
+    return series
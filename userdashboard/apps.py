@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class UserdashboardConfig(AppConfig):
     name = 'userdashboard'
+
+    def ready(self):
+        from . import signals  # noqa: F401
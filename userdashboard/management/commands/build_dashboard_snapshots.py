@@ -0,0 +1,61 @@
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from authentication.models import User
+from userdashboard import snapshots
+
+
+def _init_worker():
+    # Needed when the platform spawns workers instead of forking them
+    django.setup()
+
+
+def _build_shard(owner_ids, today):
+    try:
+        return snapshots.build(owner_ids, today)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Precomputes the dashboard category/source summaries of every user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shard-size', type=int, default=200,
+                            help='Number of users built per database transaction')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Worker processes building shards in parallel (1 builds in this process)')
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help='Only build this user id (can be repeated)')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id').values_list('id', flat=True)
+        if options['users']:
+            users = users.filter(id__in=options['users'])
+        users = list(users)
+
+        size = options['shard_size']
+        shards = [users[start:start + size] for start in range(0, len(users), size)]
+        # Every shard is built as of the same day, even across midnight
+        today = datetime.date.today()
+
+        if options['processes'] <= 1:
+            results = (snapshots.build(shard, today) for shard in shards)
+            self.report(results, shards)
+        else:
+            # Forked workers must not share this process' database sockets
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['processes'], initializer=_init_worker) as pool:
+                self.report(pool.map(_build_shard, shards, [today] * len(shards)), shards)
+
+    def report(self, results, shards):
+        built_users = 0
+        built_snapshots = 0
+        for shard, built in zip(shards, results):
+            built_users += len(shard)
+            built_snapshots += built
+            self.stdout.write(f'Built {built_users} users')
+
+        self.stdout.write(self.style.SUCCESS(f'Done, {built_snapshots} snapshots for {built_users} users'))
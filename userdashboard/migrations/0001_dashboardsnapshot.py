@@ -0,0 +1,33 @@
+# Generated by Django 3.1.4 on 2026-10-18 19:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('EXPENSE', 'EXPENSE'), ('INCOME', 'INCOME')], max_length=16)),
+                ('window', models.PositiveIntegerField()),
+                ('computed_on', models.DateField()),
+                ('watermark', models.BigIntegerField(default=0)),
+                ('totals', models.JSONField(default=dict)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dashboardsnapshot',
+            constraint=models.UniqueConstraint(fields=('owner', 'kind', 'window'), name='dashboard_snapshot_unique'),
+        ),
+    ]
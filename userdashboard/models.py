@@ -1,3 +1,25 @@
 from django.db import models
+from authentication.models import User
 
-# Create your models here.
+
+class DashboardSnapshot(models.Model):
+    KIND_OPTIONS = [
+        ('EXPENSE', 'EXPENSE'),
+        ('INCOME', 'INCOME'),
+    ]
+
+    owner = models.ForeignKey(to=User, on_delete=models.CASCADE, related_name='dashboard_snapshots')
+    kind = models.CharField(choices=KIND_OPTIONS, max_length=16)
+    window = models.PositiveIntegerField()
+    computed_on = models.DateField()
+    # Highest expense/income id included in totals, newer rows are merged in at read time
+    watermark = models.BigIntegerField(default=0)
+    totals = models.JSONField(default=dict)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'kind', 'window'], name='dashboard_snapshot_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.owner} {self.kind} {self.window}d {self.computed_on}'
@@ -0,0 +1,57 @@
+"""
+Runs the independent sections of ``/dashboard/overview/``.
+
+Sections run concurrently on a small shared thread pool sized by
+``DASHBOARD_OVERVIEW_WORKERS``; with 0 or 1 worker they run one after the
+other in the request thread. A worker opens its own database connection and
+closes it once the section is done, like a request would.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.DASHBOARD_OVERVIEW_WORKERS, thread_name_prefix='dashboard-overview')
+        return _executor
+
+
+def _timed(section):
+    start = time.perf_counter()
+    result = section()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _in_worker(section):
+    close_old_connections()
+    try:
+        return _timed(section)
+    finally:
+        close_old_connections()
+
+
+def collect(sections):
+    """
+    Runs ``{name: callable}`` and returns ``({name: result}, {name: milliseconds})``.
+
+    Callables must do all of their database work before returning: a lazy
+    queryset handed back to the request thread would run there instead.
+    """
+    if settings.DASHBOARD_OVERVIEW_WORKERS <= 1:
+        outcomes = {name: _timed(section) for name, section in sections.items()}
+    else:
+        futures = {name: _get_executor().submit(_in_worker, section) for name, section in sections.items()}
+        outcomes = {name: future.result() for name, future in futures.items()}
+
+    results = {name: result for name, (result, _) in outcomes.items()}
+    timings = {name: round(elapsed, 2) for name, (_, elapsed) in outcomes.items()}
+    return results, timings
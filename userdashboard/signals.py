@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from expenses.models import Expense
+from incomes.models import Income
+from utils.bulk import bulk_changed
+from . import snapshots
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_save, sender=Income)
+def drop_snapshots_on_update(sender, instance, created, **kwargs):
+    # New rows are merged in above the watermark, only changes to counted rows matter
+    if not created:
+        snapshots.invalidate(sender, instance.owner_id, [instance.pk])
+
+
+@receiver(bulk_changed, sender=Expense)
+@receiver(bulk_changed, sender=Income)
+def drop_snapshots_on_change(sender, owner_id, updated, deleted, **kwargs):
+    if updated or deleted:
+        snapshots.invalidate(sender, owner_id, updated + deleted)
@@ -0,0 +1,70 @@
+"""
+Builds the precomputed dashboard summaries served by ``aggregations``.
+
+A snapshot holds the category/source totals of one user for one window as of
+the day it was computed, plus a watermark: the highest expense/income id it
+counts. Readers add the rows above the watermark, so new rows show up at once;
+edits, and deletes made through the API, drop the affected snapshots (see
+``signals``) and the summary falls back to live aggregation until the next
+build. Deletes from elsewhere (admin, shell) only show after the next build.
+"""
+import datetime
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from expenses.models import Expense
+from incomes.models import Income
+from .aggregations import SNAPSHOT_KINDS, money
+from .models import DashboardSnapshot
+
+FIELDS = {Expense: 'category', Income: 'source'}
+
+
+def compute(owner_ids, today=None):
+    """Returns unsaved snapshots of every window for ``owner_ids``, two queries per model."""
+    today = today or datetime.date.today()
+    windows = settings.DASHBOARD_SNAPSHOT_WINDOWS
+    snapshots = []
+
+    for model, field in FIELDS.items():
+        # Rows committed later with a lower id are missed until the next build; builds run off-peak
+        watermark = model.objects.aggregate(watermark=Max('id'))['watermark'] or 0
+        annotations = {}
+        for window in windows:
+            in_window = Q(date__gte=today - datetime.timedelta(days=window))
+            annotations[f'total_{window}'] = Sum('amount', filter=in_window)
+            annotations[f'count_{window}'] = Count('id', filter=in_window)
+
+        rows = model.objects.filter(
+            owner_id__in=owner_ids, id__lte=watermark, date__lte=today,
+            date__gte=today - datetime.timedelta(days=max(windows)),
+        ).order_by().values('owner_id', field).annotate(**annotations)
+
+        totals = {(owner_id, window): {} for owner_id in owner_ids for window in windows}
+        for row in rows:
+            for window in windows:
+                if row[f'count_{window}']:
+                    totals[row['owner_id'], window][row[field]] = [
+                        money(row[f'total_{window}']), row[f'count_{window}']]
+
+        snapshots.extend(
+            DashboardSnapshot(owner_id=owner_id, kind=SNAPSHOT_KINDS[model], window=window,
+                              computed_on=today, watermark=watermark, totals=window_totals)
+            for (owner_id, window), window_totals in totals.items())
+
+    return snapshots
+
+
+def build(owner_ids, today=None):
+    """Replaces the snapshots of ``owner_ids``, returns how many were written."""
+    snapshots = compute(owner_ids, today)
+    with transaction.atomic():
+        DashboardSnapshot.objects.filter(owner_id__in=owner_ids).delete()
+        DashboardSnapshot.objects.bulk_create(snapshots, batch_size=500)
+    return len(snapshots)
+
+
+def invalidate(model, owner_id, ids):
+    """Drops the snapshots of ``owner_id`` that counted any of the given rows."""
+    DashboardSnapshot.objects.filter(
+        owner_id=owner_id, kind=SNAPSHOT_KINDS[model], watermark__gte=min(ids)).delete()
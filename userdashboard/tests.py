@@ -1,3 +1,235 @@
-from django.test import TestCase
+import datetime
+import io
+from unittest import mock
+from decimal import Decimal
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APITestCase, APITransactionTestCase
+from authentication.models import User, BankAccountType, UserBankAccount
+from expenses.models import Expense
+from incomes.models import Income
+from transactions import services
+from . import aggregations, overview
+from .models import DashboardSnapshot
 
-# Create your tests here.
+
+class DashboardTestMixin:
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password123')
+        self.other_user = User.objects.create_user('bob', 'bob@example.com', 'password123')
+        self.client.force_authenticate(self.user)
+        self.today = datetime.date.today()
+
+        return super().setUp()
+
+    def add_expenses(self, owner, category, amounts, days_ago=0):
+        Expense.objects.bulk_create(
+            Expense(owner=owner, category=category, amount=amount, description='',
+                    date=self.today - datetime.timedelta(days=days_ago))
+            for amount in amounts)
+
+    def add_incomes(self, owner, source, amounts, days_ago=0):
+        Income.objects.bulk_create(
+            Income(owner=owner, source=source, amount=amount, description='',
+                   date=self.today - datetime.timedelta(days=days_ago))
+            for amount in amounts)
+
+
+class DashboardTestSetUp(DashboardTestMixin, APITestCase):
+    pass
+
+
+class TestSummaries(DashboardTestSetUp):
+
+    def test_expenses_are_grouped_by_category(self):
+        self.add_expenses(self.user, 'FOOD', [Decimal('10.50'), Decimal('4.50')])
+        self.add_expenses(self.user, 'RENT', [Decimal('800')])
+        self.add_expenses(self.user, 'BUS', [Decimal('5')], days_ago=40)
+        self.add_expenses(self.other_user, 'FOOD', [Decimal('99')])
+
+        response = self.client.get('/dashboard/expenses-category-sumary/30/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['category_data_total_amount_ago'], {
+            'FOOD': {'amount': '15.00', 'count': 2, 'average': '7.50'},
+            'RENT': {'amount': '800.00', 'count': 1, 'average': '800.00'},
+        })
+
+    def test_incomes_are_grouped_by_source(self):
+        self.add_incomes(self.user, 'SALARY', [Decimal('3000'), Decimal('3100')])
+
+        response = self.client.get('/dashboard/incomes-source-sumary/30/')
+
+        self.assertEqual(response.data['income_data_total_amount_ago'], {
+            'SALARY': {'amount': '6100.00', 'count': 2, 'average': '3050.00'},
+        })
+
+    def test_query_count_does_not_grow_with_data(self):
+        for url, add, groups in (
+                ('/dashboard/expenses-category-sumary/30/', self.add_expenses, ('FOOD', 'RENT', 'BUS', 'OTHERS')),
+                ('/dashboard/incomes-source-sumary/30/', self.add_incomes, ('SALARY', 'BUSINESS', 'OTHERS'))):
+            with self.subTest(url=url):
+                add(self.user, groups[0], [1])
+                # Snapshot lookup, then the grouped query
+                with self.assertNumQueries(2):
+                    self.client.get(url)
+
+                for group in groups:
+                    add(self.user, group, range(1, 50))
+                with self.assertNumQueries(2):
+                    response = self.client.get(url)
+                self.assertEqual(len(response.data.popitem()[1]), len(groups))
+
+
+class TestSnapshots(DashboardTestSetUp):
+
+    def setUp(self):
+        super().setUp()
+        self.add_expenses(self.user, 'FOOD', [Decimal('10'), Decimal('20')], days_ago=3)
+        self.add_expenses(self.user, 'RENT', [Decimal('800')], days_ago=60)
+        self.add_incomes(self.user, 'SALARY', [Decimal('3000')], days_ago=1)
+        self.add_expenses(self.other_user, 'FOOD', [Decimal('5')])
+        call_command('build_dashboard_snapshots', '--shard-size', '1', stdout=io.StringIO())
+
+    def summary(self, days):
+        return self.client.get(f'/dashboard/expenses-category-sumary/{days}/').data['category_data_total_amount_ago']
+
+    def test_snapshots_cover_every_window(self):
+        self.assertEqual(DashboardSnapshot.objects.filter(owner=self.user).count(), 8)
+        snapshot = DashboardSnapshot.objects.get(owner=self.user, kind='EXPENSE', window=90)
+        self.assertEqual(snapshot.totals, {'FOOD': ['30.00', 2], 'RENT': ['800.00', 1]})
+
+    def test_summary_is_served_from_the_snapshot(self):
+        DashboardSnapshot.objects.filter(owner=self.user, kind='EXPENSE', window=30).update(
+            totals={'FOOD': ['1.00', 1]})
+
+        self.assertEqual(self.summary(30), {'FOOD': {'amount': '1.00', 'count': 1, 'average': '1.00'}})
+
+    def test_new_rows_are_merged_from_the_delta(self):
+        Expense.objects.create(owner=self.user, category='FOOD', amount=Decimal('6'), description='', date=self.today)
+        Expense.objects.create(owner=self.user, category='BUS', amount=Decimal('4'), description='', date=self.today)
+
+        self.assertEqual(self.summary(7), {
+            'FOOD': {'amount': '36.00', 'count': 3, 'average': '12.00'},
+            'BUS': {'amount': '4.00', 'count': 1, 'average': '4.00'},
+        })
+
+    def test_editing_a_counted_row_drops_the_snapshot(self):
+        expense = Expense.objects.filter(owner=self.user, category='FOOD').order_by('amount').first()
+        expense.amount = Decimal('15')
+        expense.save()
+
+        self.assertFalse(DashboardSnapshot.objects.filter(owner=self.user, kind='EXPENSE').exists())
+        self.assertTrue(DashboardSnapshot.objects.filter(owner=self.user, kind='INCOME').exists())
+        self.assertEqual(self.summary(30)['FOOD']['amount'], str(Decimal('20.00') + expense.amount))
+
+        expense.delete()
+        self.assertEqual(self.summary(30)['FOOD']['amount'], '20.00')
+
+    def test_stale_snapshots_are_ignored(self):
+        DashboardSnapshot.objects.update(computed_on=self.today - datetime.timedelta(days=1), totals={})
+
+        self.assertEqual(self.summary(30)['FOOD']['amount'], '30.00')
+
+
+class TestCashFlowSeries(DashboardTestSetUp):
+
+    def test_daily_series_fills_gaps_and_runs_the_net(self):
+        self.add_incomes(self.user, 'SALARY', [Decimal('100')], days_ago=5)
+        self.add_expenses(self.user, 'FOOD', [Decimal('30'), Decimal('10')], days_ago=2)
+        self.add_expenses(self.user, 'RENT', [Decimal('20')])
+        self.add_incomes(self.other_user, 'SALARY', [Decimal('999')], days_ago=2)
+
+        response = self.client.get('/dashboard/cash-flow/day/5/')
+
+        series = response.data['series']
+        self.assertEqual(len(series), 6)
+        self.assertEqual(series[0]['period'], (self.today - datetime.timedelta(days=5)).isoformat())
+        self.assertEqual([entry['net'] for entry in series],
+                         ['100.00', '0.00', '0.00', '-40.00', '0.00', '-20.00'])
+        self.assertEqual([entry['running_net'] for entry in series],
+                         ['100.00', '100.00', '100.00', '60.00', '60.00', '40.00'])
+
+    def test_monthly_year_costs_two_queries(self):
+        for days_ago in range(0, 365, 7):
+            self.add_expenses(self.user, 'FOOD', [Decimal('1')], days_ago=days_ago)
+            self.add_incomes(self.user, 'SALARY', [Decimal('2')], days_ago=days_ago)
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/dashboard/cash-flow/month/365/')
+
+        series = response.data['series']
+        self.assertIn(len(series), (12, 13))
+        self.assertEqual(series[-1]['period'], self.today.replace(day=1).isoformat())
+        self.assertEqual(series[-1]['running_net'], '53.00')
+
+    def test_weekly_buckets_start_on_monday(self):
+        response = self.client.get('/dashboard/cash-flow/week/30/')
+
+        for entry in response.data['series']:
+            self.assertEqual(datetime.date.fromisoformat(entry['period']).weekday(), 0)
+
+    def test_unknown_interval_is_rejected(self):
+        self.assertEqual(self.client.get('/dashboard/cash-flow/hour/5/').status_code, 406)
+
+    def test_bucket_count_matches_the_series(self):
+        for interval, days in (('day', 5), ('week', 30), ('month', 365)):
+            with self.subTest(interval=interval):
+                series = self.client.get(f'/dashboard/cash-flow/{interval}/{days}/').data['series']
+                self.assertEqual(aggregations.bucket_count(interval, days), len(series))
+
+    @override_settings(CASH_FLOW_MAX_BUCKETS=100)
+    def test_too_many_buckets_are_rejected(self):
+        self.assertEqual(self.client.get('/dashboard/cash-flow/day/99/').status_code, 200)
+        self.assertEqual(self.client.get('/dashboard/cash-flow/day/300000/').status_code, 400)
+        self.assertEqual(self.client.get('/dashboard/cash-flow/month/1000000/').status_code, 400)
+        self.assertEqual(self.client.get('/dashboard/expenses-category-sumary/1000000/').status_code, 400)
+
+
+class OverviewTestMixin(DashboardTestMixin):
+
+    def setUp(self):
+        super().setUp()
+        account_type = BankAccountType.objects.create(name='Basic', maximum_withdrawal_amount=500)
+        self.account = UserBankAccount.objects.create(
+            user=self.user, account_type=account_type, account_no=100, gender='F', balance=0)
+        services.deposit(self.account.id, Decimal('250'))
+        self.add_expenses(self.user, 'FOOD', [Decimal('10')], days_ago=1)
+        self.add_expenses(self.user, 'RENT', [Decimal('800')], days_ago=-3)
+        self.add_incomes(self.user, 'SALARY', [Decimal('3000')], days_ago=2)
+
+    def assert_overview(self, data):
+        self.assertEqual(data['account']['account']['balance'], '250.00')
+        self.assertEqual([t['amount'] for t in data['transactions_today']], ['250.00'])
+        self.assertEqual(data['expenses_by_category']['FOOD']['amount'], '10.00')
+        self.assertEqual(data['incomes_by_source']['SALARY']['amount'], '3000.00')
+        self.assertEqual([e['category'] for e in data['upcoming_expenses']], ['RENT'])
+        self.assertEqual(set(data['timings']), {
+            'account', 'transactions_today', 'expenses_by_category', 'incomes_by_source', 'upcoming_expenses'})
+
+
+@override_settings(DASHBOARD_OVERVIEW_WORKERS=0)
+class TestOverview(OverviewTestMixin, APITestCase):
+
+    def test_overview_returns_every_section(self):
+        with self.assertNumQueries(7):
+            response = self.client.get('/dashboard/overview/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assert_overview(response.data)
+        self.assertIn('upcoming_expenses;dur=', response['Server-Timing'])
+
+    def test_invalid_days_is_rejected(self):
+        self.assertEqual(self.client.get('/dashboard/overview/?days=abc').status_code, 406)
+
+
+@override_settings(DASHBOARD_OVERVIEW_WORKERS=4)
+class TestConcurrentOverview(OverviewTestMixin, APITransactionTestCase):
+
+    def test_sections_run_on_the_pool(self):
+        with mock.patch.object(overview, '_in_worker', wraps=overview._in_worker) as in_worker:
+            response = self.client.get('/dashboard/overview/')
+
+        self.assertEqual(in_worker.call_count, 5)
+        self.assert_overview(response.data)
@@ -1,4 +1,4 @@
-from .views import ExpensesCategorySumary, ExpensesComingSumary, IncomeSourceSumary
+from .views import CashFlowSeries, DashboardOverview, ExpensesCategorySumary, ExpensesComingSumary, IncomeSourceSumary
 from django.urls import path
 
 
@@ -6,4 +6,6 @@ urlpatterns = [
     path('expenses-category-sumary/<int:days>/', ExpensesCategorySumary.as_view(), name="expenses-category-sumary"),
     path('expenses-coming-sumary/<int:days>/', ExpensesComingSumary.as_view(), name="expenses-coming-sumary"),
     path('incomes-source-sumary/<int:days>/', IncomeSourceSumary.as_view(), name="incomes-source-sumary"),
+    path('cash-flow/<str:interval>/<int:days>/', CashFlowSeries.as_view(), name="cash-flow-series"),
+    path('overview/', DashboardOverview.as_view(), name="dashboard-overview"),
 ]
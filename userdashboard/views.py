@@ -2,40 +2,25 @@ from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView
 from rest_framework import response, status
 from rest_framework import permissions
+from rest_framework.exceptions import NotAcceptable, ValidationError
+from django.conf import settings
+from authentication.models import User
+from authentication.serializers import UserDataSerializer
 from expenses.models import Expense
 from expenses.serializers import ExpenseSerializer
 from incomes.models import Income
+from transactions.models import Transaction
+from transactions.serializers import TransactionSerializer
+from utils.timeranges import days_range
+from . import aggregations, overview
 import datetime
 
 
 class ExpensesCategorySumary(APIView):
-
-    def get_category_amount(self, expense_list, category):
-        expenses = expense_list.filter(category=category)
-        amount = 0
-
-        for expense in expenses:
-            amount += expense.amount
-
-        return {'amount': str(amount)}
-
-    def get_category(self, expense):
-        return expense.category
+    permission_classes = (permissions.IsAuthenticated, )
 
     def get(self, request, days):
-        today_date = datetime.date.today()
-        date_ago = today_date-datetime.timedelta(days)
-        expenses = Expense.objects.filter(
-            owner=request.user, date__gte=date_ago, date__lte=today_date)
-
-        result = {}
-
-        categories = list(set(map(self.get_category, expenses)))
-
-        for expense in expenses:
-            for category in categories:
-                result[category] = self.get_category_amount(expenses, category)
-
+        result = aggregations.summarize_period(Expense, request.user, 'category', days)
         return response.Response({'category_data_total_amount_ago': result}, status=status.HTTP_200_OK)
 
 
@@ -52,31 +37,65 @@ class ExpensesComingSumary(ListAPIView):
 
 
 class IncomeSourceSumary(APIView):
+    permission_classes = (permissions.IsAuthenticated, )
 
-    def get_source_amount(self, income_list, source):
-        incomes = income_list.filter(source=source)
-        amount = 0
+    def get(self, request, days):
+        result = aggregations.summarize_period(Income, request.user, 'source', days)
+        return response.Response({'income_data_total_amount_ago': result}, status=status.HTTP_200_OK)
 
-        for income in incomes:
-            amount += income.amount
 
-        return {'amount': str(amount)}
+class CashFlowSeries(APIView):
+    permission_classes = (permissions.IsAuthenticated, )
 
-    def get_source(self, income, days):
-        return income.source
+    def get(self, request, interval, days):
+        if interval not in aggregations.INTERVALS:
+            raise NotAcceptable(f'Interval must be one of: {", ".join(aggregations.INTERVALS)}')
+        if aggregations.bucket_count(interval, days) > settings.CASH_FLOW_MAX_BUCKETS:
+            raise ValidationError(
+                {'days': f'At most {settings.CASH_FLOW_MAX_BUCKETS} {interval}s can be returned at once'})
 
-    def get(self, request, days):
-        today_date = datetime.date.today()
-        year_ago = today_date-datetime.timedelta(days=days)
-        incomes = Income.objects.filter(
-            owner=request.user, date__gte=year_ago, date__lte=today_date)
-
-        result = {}
+        series = aggregations.cash_flow_series(request.user, interval, days)
+        return response.Response({'interval': interval, 'series': series}, status=status.HTTP_200_OK)
 
-        sources = list(set(map(self.get_source, incomes)))
 
-        for income in incomes:
-            for source in sources:
-                result[source] = self.get_source_amount(incomes, source)
+class DashboardOverview(APIView):
+    """
+    Everything the dashboard opens with in one request: the user and balance,
+    today's latest transactions, the category and source summaries and the
+    upcoming expenses, all over ``?days=`` (30 by default).
+    """
+    permission_classes = (permissions.IsAuthenticated, )
 
-        return response.Response({'income_data_total_amount_ago': result}, status=status.HTTP_200_OK)
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            raise NotAcceptable('days must be a number')
+        user = request.user
+
+        def account():
+            return UserDataSerializer(User.objects.select_related('address', 'account').get(pk=user.pk)).data
+
+        def transactions_today():
+            start, end = days_range()
+            queryset = Transaction.objects.filter(account__user=user, timestamp__gte=start, timestamp__lt=end) \
+                .order_by('-timestamp', '-id')[:settings.DASHBOARD_OVERVIEW_TRANSACTIONS]
+            return TransactionSerializer(queryset, many=True).data
+
+        def upcoming_expenses():
+            today_date = datetime.date.today()
+            queryset = Expense.objects.filter(
+                owner=user, date__gte=today_date, date__lte=today_date + datetime.timedelta(days))
+            return ExpenseSerializer(queryset.order_by('date', 'id'), many=True).data
+
+        results, timings = overview.collect({
+            'account': account,
+            'transactions_today': transactions_today,
+            'expenses_by_category': lambda: aggregations.summarize_period(Expense, user, 'category', days),
+            'incomes_by_source': lambda: aggregations.summarize_period(Income, user, 'source', days),
+            'upcoming_expenses': upcoming_expenses,
+        })
+
+        data = response.Response({**results, 'timings': timings}, status=status.HTTP_200_OK)
+        data['Server-Timing'] = ', '.join(f'{name};dur={elapsed}' for name, elapsed in timings.items())
+        return data
@@ -0,0 +1,129 @@
+"""
+Batch create/update/delete for models owned by the requesting user.
+
+The body carries three optional arrays::
+
+    {"create": [{...}], "update": [{"id": 1, ...}], "delete": [2, 3]}
+
+Creates are validated first, with a ``many=True`` serializer. The updated and
+deleted rows are then locked, validated and written in one transaction: one
+filtered ``delete``, one ``bulk_update`` and one ``bulk_create``. Any id that
+is not the user's fails the whole batch with 404, the same answer the detail
+views give for someone else's row.
+"""
+import copy
+from django.conf import settings
+from django.db import connection, transaction
+from django.dispatch import Signal
+from rest_framework import permissions, serializers, status
+from rest_framework.exceptions import NotAcceptable, NotFound
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+# Sent once changes commit, with ``owner_id``, ``updated`` and ``deleted`` id lists. Receivers
+# use it instead of post_save/post_delete, which bulk_update skips and which would turn the
+# filtered delete into a SELECT plus one signal per row
+bulk_changed = Signal()
+
+
+def _create(model, instances):
+    """``bulk_create`` that leaves the new primary keys on ``instances`` on every backend."""
+    if not instances or connection.features.can_return_rows_from_bulk_insert:
+        model.objects.bulk_create(instances)
+    elif connection.vendor == 'sqlite':
+        model.objects.bulk_create(instances)
+        # SQLite holds the write lock until commit, so the newest ids are the ones just inserted
+        ids = model.objects.order_by('-pk').values_list('pk', flat=True)[:len(instances)]
+        for instance, pk in zip(instances, reversed(ids)):
+            instance.pk = pk
+    else:
+        for instance in instances:
+            instance.save(force_insert=True)
+
+
+class BulkRequestSerializer(serializers.Serializer):
+    create = serializers.ListField(child=serializers.DictField(), required=False, default=list)
+    update = serializers.ListField(child=serializers.DictField(), required=False, default=list)
+    delete = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+
+    def validate(self, attrs):
+        if sum(len(items) for items in attrs.values()) > settings.MAX_BULK_OPERATIONS:
+            raise NotAcceptable(f'You can send at most {settings.MAX_BULK_OPERATIONS} operations at once')
+
+        update_ids = [item.get('id') for item in attrs['update']]
+        if not all(isinstance(id, int) for id in update_ids):
+            raise serializers.ValidationError({'update': 'Every update needs an integer id'})
+        if len(set(update_ids + attrs['delete'])) != len(update_ids) + len(attrs['delete']):
+            raise serializers.ValidationError('An id can only appear once across update and delete')
+
+        return attrs
+
+
+class BulkOwnedAPIView(APIView):
+    """
+    ``POST`` applies a batch of changes to ``serializer_class``'s model,
+    restricted to rows whose ``owner`` is the requesting user.
+    """
+    serializer_class = None
+    permission_classes = (permissions.IsAuthenticated, )
+
+    def post(self, request, *args, **kwargs):
+        operations = BulkRequestSerializer(data=request.data)
+        operations.is_valid(raise_exception=True)
+        create, update, delete = (operations.validated_data[key] for key in ('create', 'update', 'delete'))
+
+        model = self.serializer_class.Meta.model
+        owned = model.objects.filter(owner=request.user)
+
+        created = self.serializer_class(data=create, many=True)
+        if not created.is_valid():
+            raise serializers.ValidationError({'create': created.errors})
+
+        new_instances = [model(owner=request.user, **values) for values in created.validated_data]
+
+        with transaction.atomic():
+            # One locked lookup checks ownership of every updated and deleted id. Locked, so a
+            # concurrent detail edit or delete can't change the old rows bulk_written() is given
+            existing = owned.select_for_update().in_bulk([item['id'] for item in update] + delete)
+            if len(existing) != len(update) + len(delete):
+                raise NotFound()
+            instances = [existing[item['id']] for item in update]
+            removed = [copy.copy(instance) for instance in instances] + [existing[id] for id in delete]
+            updated = self.serializer_class(instances, data=update, many=True, partial=True)
+            if not updated.is_valid():
+                raise serializers.ValidationError({'update': updated.errors})
+
+            fields = set()
+            for instance, values in zip(instances, updated.validated_data):
+                for field, value in values.items():
+                    setattr(instance, field, value)
+                    fields.add(field)
+
+            if delete:
+                deleted = owned.filter(id__in=delete).delete()[1].get(model._meta.label, 0)
+                if deleted != len(delete):
+                    # Rolls the deletion back too
+                    raise NotFound()
+            if fields:
+                model.objects.bulk_update(instances, fields)
+            _create(model, new_instances)
+            extra = self.bulk_written(removed, instances + new_instances)
+
+            transaction.on_commit(lambda: bulk_changed.send(
+                sender=model, owner_id=request.user.pk, updated=[instance.pk for instance in instances],
+                deleted=delete))
+
+        return Response({
+            'created': self.serializer_class(new_instances, many=True).data,
+            'updated': self.serializer_class(instances, many=True).data,
+            'deleted': delete,
+            **extra,
+        }, status=status.HTTP_200_OK)
+
+    def bulk_written(self, removed, added):
+        """
+        Runs inside the batch's transaction once it is written. ``removed`` holds
+        deleted rows and the previous state of updated ones, ``added`` the new
+        state of updated rows and the created ones. Returns extra response keys.
+        """
+        return {}
@@ -0,0 +1,30 @@
+import hashlib
+from calendar import timegm
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Strong ETag built from whatever identifies the current state of a resource."""
+    return quote_etag(hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()[:40])
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(timegm(last_modified.utctimetuple()))
+    # Clients must revalidate, and shared caches must not keep per-user data
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Returns a ready 304 (or 412) response when the request's ``If-None-Match`` /
+    ``If-Modified-Since`` headers match the given validators, ``None`` otherwise.
+    """
+    timestamp = timegm(last_modified.utctimetuple()) if last_modified is not None else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
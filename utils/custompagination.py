@@ -1,4 +1,7 @@
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
 
 
 class MaxSizePerPage30(pagination.PageNumberPagination):
@@ -11,3 +14,104 @@ class MaxSizePerPage10(pagination.PageNumberPagination):
 
 class MaxSizePerPage5(pagination.PageNumberPagination):
     page_size = 5
+
+
+class TimestampCursorPagination(pagination.CursorPagination):
+    """
+    Keyset pagination over ``(timestamp, id)``, newest first.
+
+    Each page is a ``WHERE (timestamp, id) < cursor ORDER BY ... LIMIT`` range
+    scan, so there is no ``COUNT(*)`` and no ``OFFSET``. Clients that need
+    totals can opt into page-number mode by sending ``?page=<n>``.
+    """
+    ordering = ('-timestamp', '-id')
+    page_number_class = MaxSizePerPage30
+    page_number_query_param = 'page'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.page_number_query_param in request.query_params:
+            self.page_number_paginator = self.page_number_class()
+            page = self.page_number_paginator.paginate_queryset(queryset, request, view)
+            self.display_page_controls = self.page_number_paginator.display_page_controls
+            return page
+        self.page_number_paginator = None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+
+        if self.cursor is None:
+            reverse = False
+            queryset = queryset.order_by('-timestamp', '-id')
+        else:
+            timestamp, pk = self._parse_position(self.cursor.position)
+            reverse = self.cursor.reverse
+            if reverse:
+                queryset = queryset.filter(
+                    Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=pk)).order_by('timestamp', 'id')
+            else:
+                queryset = queryset.filter(
+                    Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk)).order_by('-timestamp', '-id')
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_paginated_response(self, data):
+        if self.page_number_paginator is not None:
+            return self.page_number_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.page_number_paginator is not None:
+            return self.page_number_paginator.to_html()
+        return super().to_html()
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(pagination.Cursor(
+            offset=0, reverse=False, position=self._get_position_from_instance(self.page[-1], self.ordering)))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(pagination.Cursor(
+            offset=0, reverse=True, position=self._get_position_from_instance(self.page[0], self.ordering)))
+
+    def _get_position_from_instance(self, instance, ordering):
+        return f'{instance.timestamp.isoformat()}|{instance.id}'
+
+    def _parse_position(self, position):
+        try:
+            timestamp, pk = position.split('|')
+            timestamp = parse_datetime(timestamp)
+            pk = int(pk)
+        except (AttributeError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if timestamp is None:
+            raise NotFound(self.invalid_cursor_message)
+        return timestamp, pk
+
+
+class CursorMaxSizePerPage30(TimestampCursorPagination):
+    page_size = 30
+    page_number_class = MaxSizePerPage30
+
+
+class CursorMaxSizePerPage10(TimestampCursorPagination):
+    page_size = 10
+    page_number_class = MaxSizePerPage10
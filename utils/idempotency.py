@@ -0,0 +1,86 @@
+"""
+``Idempotency-Key`` support for money-movement endpoints.
+
+The first request carrying a key claims it in the cache with ``cache.add`` and
+runs normally; a successful response is then stored under the key for
+``IDEMPOTENCY_KEY_TTL`` seconds and replayed for any retry, without running
+the handler again. A retry that arrives while the first request is still in
+flight polls the cache until the response is stored instead of racing it.
+
+Keys are scoped per user and path. The cache must be shared between workers
+(Redis, Memcached, database) for this to hold across processes.
+"""
+import functools
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+PENDING = 'pending'
+DONE = 'done'
+
+
+class IdempotencyKeyInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is still being processed, try again later.'
+    default_code = 'idempotency_key_in_progress'
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'This Idempotency-Key was already used with a different request body.'
+    default_code = 'idempotency_key_reused'
+
+
+def _replay(record, fingerprint):
+    if record['fingerprint'] != fingerprint:
+        raise IdempotencyKeyReused()
+
+    response = Response(record['data'], status=record['status_code'])
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(handler):
+    """Decorates a view's ``post`` so requests with an ``Idempotency-Key`` header run at most once."""
+
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.META.get('HTTP_IDEMPOTENCY_KEY')
+        if not key:
+            return handler(view, request, *args, **kwargs)
+
+        cache_key = 'idempotency:' + hashlib.sha256(
+            f'{request.user.pk}:{request.path}:{key}'.encode()).hexdigest()
+        fingerprint = hashlib.sha256(request.body).hexdigest()
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+
+        while not cache.add(cache_key, {'state': PENDING, 'fingerprint': fingerprint},
+                            settings.IDEMPOTENCY_LOCK_TIMEOUT):
+            record = cache.get(cache_key)
+            if record is not None and record['state'] == DONE:
+                return _replay(record, fingerprint)
+            if record is not None and record['fingerprint'] != fingerprint:
+                raise IdempotencyKeyReused()
+            if time.monotonic() >= deadline:
+                raise IdempotencyKeyInProgress()
+            time.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+
+        try:
+            response = handler(view, request, *args, **kwargs)
+        except Exception:
+            # Nothing was written, let the retry run for real
+            cache.delete(cache_key)
+            raise
+
+        if status.is_success(response.status_code):
+            cache.set(cache_key, {'state': DONE, 'fingerprint': fingerprint, 'status_code': response.status_code,
+                                  'data': response.data}, settings.IDEMPOTENCY_KEY_TTL)
+        else:
+            cache.delete(cache_key)
+        return response
+
+    return wrapper
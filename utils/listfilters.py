@@ -0,0 +1,49 @@
+"""
+Query-string filters for the owner-scoped expense and income lists.
+
+Filters are validated like any other input and applied in the order of the
+``(owner, <choice field>, date)`` and ``(owner, -date)`` indexes, so the
+database walks the user's index range instead of the whole table.
+"""
+from rest_framework import serializers
+
+
+def filter_serializer(choice_field, choices):
+    """
+    Builds the serializer validating ``date_from``, ``date_to``, ``amount_min``,
+    ``amount_max`` and ``choice_field``.
+    """
+    fields = {
+        'date_from': serializers.DateField(required=False),
+        'date_to': serializers.DateField(required=False),
+        'amount_min': serializers.DecimalField(max_digits=10, decimal_places=2, required=False),
+        'amount_max': serializers.DecimalField(max_digits=10, decimal_places=2, required=False),
+        # ?category=FOOD&category=BUS
+        choice_field: serializers.MultipleChoiceField(choices=choices, required=False),
+    }
+    return type('ListFilterSerializer', (serializers.Serializer, ), fields)
+
+
+class OwnedListFilterMixin:
+    """``get_queryset()`` for list views: the user's rows, narrowed by the query-string filters."""
+    choice_field = None
+
+    def get_queryset(self):
+        model = self.queryset.model
+        choices = model._meta.get_field(self.choice_field).choices
+        params = filter_serializer(self.choice_field, choices)(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        queryset = self.queryset.filter(owner=self.request.user)
+        if params.get(self.choice_field):
+            queryset = queryset.filter(**{f'{self.choice_field}__in': sorted(params[self.choice_field])})
+        if 'date_from' in params:
+            queryset = queryset.filter(date__gte=params['date_from'])
+        if 'date_to' in params:
+            queryset = queryset.filter(date__lte=params['date_to'])
+        if 'amount_min' in params:
+            queryset = queryset.filter(amount__gte=params['amount_min'])
+        if 'amount_max' in params:
+            queryset = queryset.filter(amount__lte=params['amount_max'])
+        return queryset
@@ -0,0 +1,19 @@
+from rest_framework import renderers
+
+
+class EnvelopeRender(renderers.JSONRenderer):
+    """
+    Wraps the payload as ``{"data": ...}``, or ``{"errors": ...}`` for error responses.
+
+    Errors are told apart from the response itself (DRF flags responses built
+    by the exception handler, and any 4xx/5xx counts), never by stringifying
+    the payload. Encoding is done once by DRF's encoder, which handles
+    ``Decimal``, dates and datetimes natively.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        is_error = response is not None and (response.exception or response.status_code >= 400)
+
+        return super().render({'errors' if is_error else 'data': data}, accepted_media_type, renderer_context)
@@ -0,0 +1,38 @@
+import datetime
+import pytz
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+
+def report_timezone():
+    return pytz.timezone(settings.REPORT_TIME_ZONE)
+
+
+def local_date(value=None):
+    """Calendar date of ``value`` (default: now) in the report time zone."""
+    return timezone.localtime(value or timezone.now(), report_timezone()).date()
+
+
+def start_of_day(date):
+    """Aware datetime of local midnight at the start of ``date``."""
+    tz = report_timezone()
+    return tz.normalize(tz.localize(datetime.datetime.combine(date, datetime.time.min)))
+
+
+def days_ago(days, today=None):
+    """Local date ``days`` days before ``today``, 400 when that is before the calendar starts."""
+    today = today or local_date()
+    try:
+        return today - datetime.timedelta(days)
+    except OverflowError:
+        raise ValidationError({'days': f'days can be at most {(today - datetime.date.min).days}'})
+
+
+def days_range(days=0):
+    """
+    Half-open ``[start, end)`` range covering today plus the previous ``days``
+    local days, so filters stay ``timestamp__gte``/``timestamp__lt`` range scans.
+    """
+    today = local_date()
+    return start_of_day(days_ago(days, today)), start_of_day(today + datetime.timedelta(1))